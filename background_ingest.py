@@ -7,85 +7,162 @@ Allows real-time querying while ingestion runs in background
 import os
 import sys
 import time
+import argparse
 import threading
 import signal
+import multiprocessing
 from datetime import datetime
-from src.ingest import ingest_from_config
+from src.ingest import ingest_from_config, DEFAULT_WORKERS
 from src.vector_store import get_collection_stats, collection_exists, create_collection
 
+STATS_CACHE_SECONDS = 2.0
+
+def _run_ingestion_mp(incremental, daily, force, workers, stop_event):
+    """
+    Run ingestion in the background worker process
+    """
+    # Ctrl+C reaches the whole process group; the parent decides how to stop us. Our own
+    # group keeps it from the PDF and Qdrant upload processes started below as well (the
+    # upload pool takes no initializer to ignore it)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if hasattr(os, "setpgrp"):
+        os.setpgrp()
+    
+    try:
+        print(f"🔄 Starting background ingestion...")
+        print(f"   Mode: {'Incremental' if incremental else 'Daily' if daily else 'Full'}")
+        print(f"   Workers: {workers}")
+        
+        # Ensure collection exists
+        if not collection_exists():
+            create_collection()
+        
+        # Run ingestion
+        # Workers check the stop event between pages, so stop_ingestion() halts cleanly
+        ingest_from_config(incremental=incremental, daily=daily, force=force,
+                           workers=workers, stop_event=stop_event)
+        
+        print("✅ Background ingestion completed")
+        
+    except Exception as e:
+        print(f"❌ Background ingestion error: {e}")
+
 class BackgroundIngestion:
     def __init__(self):
-        self.ingestion_running = False
-        self.ingestion_thread = None
+        self._mp_context = multiprocessing.get_context("spawn")
+        self.ingestion_process = None
         self.stop_requested = False
+        # Cross-process stop request, checked by the worker between pages
+        self._stop_event_mp = self._mp_context.Event()
+        # Wakes the waiting main thread (signals, worker exit)
+        self._stop_event = threading.Event()
+        # Set by the watcher thread, the only one joining the worker process
+        self._process_exited = threading.Event()
+        self._orig_handlers = {}
+        self._stats_cache = (0.0, None)
         
-    def start_background_ingestion(self, incremental=True, daily=False, force=False):
+    def start_background_ingestion(self, incremental=True, daily=False, force=False, workers=DEFAULT_WORKERS):
         """
-        Start ingestion in background thread
+        Start ingestion in a background process
         """
         if self.ingestion_running:
             print("⚠️ Ingestion already running")
             return
         
-        self.ingestion_running = True
         self.stop_requested = False
+        self._stop_event.clear()
+        self._stop_event_mp.clear()
+        self._process_exited.clear()
         
-        # Start ingestion in background thread
-        self.ingestion_thread = threading.Thread(
-            target=self._run_ingestion,
-            args=(incremental, daily, force),
-            daemon=True
+        # Start ingestion in a separate process so embedding work never competes with
+        # queries for this interpreter's GIL, and so a stuck run can be killed outright
+        self.ingestion_process = self._mp_context.Process(
+            target=_run_ingestion_mp,
+            args=(incremental, daily, force, workers, self._stop_event_mp),
+            # Not a daemon: ingestion starts its own PDF and upload worker processes, which
+            # daemonic processes may not have (stop_ingestion joins or terminates it)
+            daemon=False
         )
-        self.ingestion_thread.start()
+        self.ingestion_process.start()
+        threading.Thread(target=self._watch_process, args=(self.ingestion_process,), daemon=True).start()
+        
+        # SIGTERM (systemd/supervisord) and Ctrl+C request a graceful stop instead of killing mid-batch.
+        # Handlers can only be installed from the main thread.
+        if threading.current_thread() is threading.main_thread():
+            for sig in (signal.SIGTERM, signal.SIGINT):
+                self._orig_handlers[sig] = signal.signal(sig, self._handle_signal)
         
         print("🚀 Background ingestion started")
         print("💡 You can now query the system while ingestion runs")
-        
-    def _run_ingestion(self, incremental, daily, force):
-        """
-        Run ingestion in background thread
-        """
-        try:
-            print(f"🔄 Starting background ingestion...")
-            print(f"   Mode: {'Incremental' if incremental else 'Daily' if daily else 'Full'}")
-            
-            # Ensure collection exists
-            if not collection_exists():
-                create_collection()
-            
-            # Run ingestion
-            ingest_from_config(incremental=incremental, daily=daily, force=force)
-            
-            print("✅ Background ingestion completed")
-            
-        except Exception as e:
-            print(f"❌ Background ingestion error: {e}")
-        finally:
-            self.ingestion_running = False
+    
+    def _watch_process(self, process):
+        """
+        Wake the main thread (and stop_ingestion) as soon as the worker process exits
+        """
+        process.join()
+        self._process_exited.set()
+        self._stop_event.set()
+    
+    @property
+    def ingestion_running(self):
+        """
+        Whether the ingestion worker process is currently running
+        """
+        return self.ingestion_process is not None and self.ingestion_process.is_alive()
+    
+    def _handle_signal(self, signum, frame):
+        """
+        Signal handler: wake the waiting main thread, which then stops the ingestion
+        """
+        # Only thread-level state here: setting the multiprocessing event from a handler
+        # can deadlock if the main thread was interrupted inside a wait on it
+        self.stop_requested = True
+        self._stop_event.set()
+    
+    def _restore_signal_handlers(self):
+        """
+        Put back the signal handlers that were active before ingestion started
+        """
+        for sig, handler in self._orig_handlers.items():
+            signal.signal(sig, handler)
+        self._orig_handlers.clear()
     
     def stop_ingestion(self):
         """
         Stop background ingestion
         """
+        self._restore_signal_handlers()
+        
         if not self.ingestion_running:
             print("⚠️ No ingestion running")
             return
         
         self.stop_requested = True
+        self._stop_event_mp.set()
         print("🛑 Stopping background ingestion...")
         
-        # Wait for thread to finish
-        if self.ingestion_thread:
-            self.ingestion_thread.join(timeout=30)
+        # Graceful stop first, then SIGTERM, then SIGKILL (the watcher thread reports the exit)
+        process = self.ingestion_process
+        if not self._process_exited.wait(timeout=30):
+            print("⚠️ Ingestion did not stop within 30s, terminating worker process")
+            process.terminate()
+        if not self._process_exited.wait(timeout=5):
+            print("⚠️ Worker process ignored SIGTERM, killing it")
+            process.kill()
+            self._process_exited.wait()
         
-        self.ingestion_running = False
         print("✅ Background ingestion stopped")
     
     def get_status(self):
         """
         Get ingestion status
         """
-        stats = get_collection_stats()
+        # Reuse Qdrant stats fetched within the last STATS_CACHE_SECONDS
+        now = time.monotonic()
+        fetched_at, stats = self._stats_cache
+        if stats is None or now - fetched_at >= STATS_CACHE_SECONDS:
+            stats = get_collection_stats()
+            self._stats_cache = (now, stats)
         
         status = {
             "ingestion_running": self.ingestion_running,
@@ -101,23 +178,80 @@ class BackgroundIngestion:
         """
         status = self.get_status()
         
-        print("📊 Background Ingestion Status:")
-        print(f"   Running: {'✅ Yes' if status['ingestion_running'] else '❌ No'}")
-        print(f"   Stop Requested: {'✅ Yes' if status['stop_requested'] else '❌ No'}")
+        lines = ["📊 Background Ingestion Status:"]
+        lines.append(f"   Running: {'✅ Yes' if status['ingestion_running'] else '❌ No'}")
+        lines.append(f"   Stop Requested: {'✅ Yes' if status['stop_requested'] else '❌ No'}")
         
         if status['collection_stats']:
             stats = status['collection_stats']
-            print(f"   Collection Points: {stats.get('points_count', 0)}")
-            print(f"   Collection Status: {stats.get('status', 'unknown')}")
-            print(f"   Indexed Vectors: {stats.get('indexed_vectors_count', 0)}")
+            lines.append(f"   Collection Points: {stats.get('points_count', 0)}")
+            lines.append(f"   Collection Status: {stats.get('status', 'unknown')}")
+            lines.append(f"   Indexed Vectors: {stats.get('indexed_vectors_count', 0)}")
         else:
-            print("   Collection: Not available")
+            lines.append("   Collection: Not available")
+        
+        # One write per report instead of one per line
+        sys.stdout.write("\n".join(lines) + "\n")
+        sys.stdout.flush()
+
+def _cmd_start(bg_ingest, args):
+    # --daily / --force switch incremental off; incremental is the default
+    incremental = not (args.daily or args.force)
+    bg_ingest.start_background_ingestion(incremental=incremental, daily=args.daily, force=args.force, workers=args.workers)
+    
+    # Keep main thread alive; SIGINT/SIGTERM and the end of ingestion set the stop event and wake the wait
+    while not bg_ingest._stop_event.wait(5):
+        print("💡 Ingestion running... Press Ctrl+C to stop")
+    
+    if bg_ingest.stop_requested:
+        print("\n🛑 Received interrupt signal")
+        bg_ingest.stop_ingestion()
+
+def _cmd_stop(bg_ingest, args):
+    bg_ingest.stop_ingestion()
+
+def _cmd_status(bg_ingest, args):
+    bg_ingest.print_status()
+
+def _cmd_query(bg_ingest, args):
+    # Test query functionality
+    print("🧪 Testing query functionality...")
+    from src.query import main as query_main
+    query_main()
+
+def build_parser():
+    """
+    Build the command line parser for background ingestion
+    """
+    parser = argparse.ArgumentParser(prog="background_ingest.py", description="Background Ingestion System")
+    subparsers = parser.add_subparsers(dest="command")
+    
+    sub = subparsers.add_parser("start", help="Start background ingestion")
+    mode = sub.add_mutually_exclusive_group()
+    mode.add_argument("--incremental", action="store_true", help="Run incremental ingestion (default)")
+    mode.add_argument("--daily", action="store_true", help="Run daily ingestion")
+    mode.add_argument("--force", action="store_true", help="Force full ingestion")
+    sub.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Number of page fetch workers (default: 8)")
+    sub.set_defaults(func=_cmd_start)
+    
+    sub = subparsers.add_parser("stop", help="Stop background ingestion")
+    sub.set_defaults(func=_cmd_stop)
+    
+    sub = subparsers.add_parser("status", help="Show status")
+    sub.set_defaults(func=_cmd_status)
+    
+    sub = subparsers.add_parser("query", help="Test query while ingestion runs")
+    sub.set_defaults(func=_cmd_query)
+    
+    return parser
 
 def main():
     """
     Main function for background ingestion
     """
-    if len(sys.argv) < 2:
+    args = build_parser().parse_args()
+    
+    if args.command is None:
         print("""
 🚀 Background Ingestion System
 
@@ -134,51 +268,20 @@ Options for start:
   --incremental - Run incremental ingestion (default)
   --daily       - Run daily ingestion
   --force       - Force full ingestion
+  --workers N   - Number of page fetch workers (default: 8)
 
 Examples:
   python background_ingest.py start
   python background_ingest.py start --incremental
   python background_ingest.py start --force
+  python background_ingest.py start --workers 16
   python background_ingest.py status
   python background_ingest.py stop
   python background_ingest.py query
 """)
         return
     
-    command = sys.argv[1].lower()
-    bg_ingest = BackgroundIngestion()
-    
-    if command == "start":
-        # Parse options
-        incremental = "--incremental" in sys.argv or "--daily" not in sys.argv and "--force" not in sys.argv
-        daily = "--daily" in sys.argv
-        force = "--force" in sys.argv
-        
-        bg_ingest.start_background_ingestion(incremental=incremental, daily=daily, force=force)
-        
-        # Keep main thread alive
-        try:
-            while bg_ingest.ingestion_running and not bg_ingest.stop_requested:
-                time.sleep(5)
-                print("💡 Ingestion running... Press Ctrl+C to stop")
-        except KeyboardInterrupt:
-            print("\n🛑 Received interrupt signal")
-            bg_ingest.stop_ingestion()
-    
-    elif command == "stop":
-        bg_ingest.stop_ingestion()
-    
-    elif command == "status":
-        bg_ingest.print_status()
-    
-    elif command == "query":
-        # Test query functionality
-        print("🧪 Testing query functionality...")
-        from src.query import main as query_main
-        query_main()
-    
-    else:
-        print(f"❌ Unknown command: {command}")
+    args.func(BackgroundIngestion(), args)
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -37,7 +37,7 @@ def demo_incremental_ingestion():
     print("   ✅ Detailed logging - tracks what was updated vs skipped")
     
     print("\n4. 📁 Files Created:")
-    print("   - progress/ingestion_progress.json - tracks all progress")
+    print("   - progress/ingestion.db - tracks all progress (SQLite)")
     print("   - logs/ - contains detailed ingestion logs")
     
     print("\n5. 🎯 Usage Examples:")
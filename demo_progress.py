@@ -31,7 +31,7 @@ def demo_progress_features():
             print(f"   ⚠️  Incomplete - can resume from {percentage:.1f}%")
     
     print("\n2. 🔄 Resume Capabilities:")
-    print("   ✅ Progress saved after each batch")
+    print("   ✅ Progress committed every 100 pages or 60s, and on stop")
     print("   ✅ Can resume from exact point where it stopped")
     print("   ✅ Tracks space, page, and batch progress")
     print("   ✅ Percentage completion tracking")
@@ -61,7 +61,7 @@ def demo_progress_features():
     print("   python main.py ingest-config --force")
     
     print("\n5. 📁 Progress Files:")
-    print("   - progress/ingestion_progress.json - Main progress file")
+    print("   - progress/ingestion.db - Main progress database (SQLite, WAL mode)")
     print("   - logs/ - Detailed ingestion logs")
     print("   - Automatic backup of progress data")
     
@@ -88,7 +88,7 @@ sudo -u elp-chat TMPDIR=$CACHE_DIR $VENV_DIR/bin/pip install --cache-dir $CACHE_
 
 echo 'Setting up Qdrant with persistent storage...'
 sudo mkdir -p /mnt/data/qdrant
-sudo docker run -d --name qdrant -p 6333:6333 -v /mnt/data/qdrant:/qdrant/storage qdrant/qdrant
+sudo docker run -d --name qdrant -p 6333:6333 -p 6334:6334 -v /mnt/data/qdrant:/qdrant/storage qdrant/qdrant
 sudo docker update --restart=always qdrant
 
 echo 'Creating systemd service...'
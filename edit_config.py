@@ -7,6 +7,62 @@ import json
 import os
 from src.config_loader import load_qa_config, save_qa_config
 
+MENU = """
+📊 Current Configuration:
+1. Context Settings:
+   - Documents retrieved: {top_k}
+   - Context length (tokens): {ctx_len}
+   - Max context chars: {max_chars}
+
+2. Model Settings:
+   - LLM Model: {llm}
+   - Embedding Model: {emb}
+
+3. Debug Settings:
+   - Debug logging: {debug}
+
+Options:
+1 - Change documents retrieved
+2 - Change context length
+3 - Change max context chars
+4 - Toggle debug logging
+5 - Save and exit
+6 - Exit without saving"""
+
+def _set_context_int(config, key, prompt, label):
+    """Prompt for a new integer value of a context setting"""
+    try:
+        new_value = int(input(f"Enter new {prompt} (current: {config['context_settings'][key]}): "))
+        config['context_settings'][key] = new_value
+        print(f"✅ Set {label} to {new_value}")
+    except ValueError:
+        print("❌ Please enter a valid number")
+
+def _set_top_k(config):
+    """Change the number of documents retrieved"""
+    _set_context_int(config, 'default_top_k', "number of documents", "documents retrieved")
+
+def _set_ctx_len(config):
+    """Change the LLM context length"""
+    _set_context_int(config, 'default_context_length', "context length", "context length")
+
+def _set_max_chars(config):
+    """Change the maximum context characters"""
+    _set_context_int(config, 'max_context_chars', "max context chars", "max context chars")
+
+def _toggle_debug(config):
+    """Toggle debug logging"""
+    current = config['debug_settings']['enable_debug_logging']
+    config['debug_settings']['enable_debug_logging'] = not current
+    print(f"✅ Toggled debug logging to {not current}")
+
+EDIT_ACTIONS = {
+    '1': _set_top_k,
+    '2': _set_ctx_len,
+    '3': _set_max_chars,
+    '4': _toggle_debug,
+}
+
 def edit_config():
     """Interactive configuration editor"""
     print("🔧 Q&A Bot Configuration Editor")
@@ -16,57 +72,17 @@ def edit_config():
     config = load_qa_config()
     
     while True:
-        print("\n📊 Current Configuration:")
-        print("1. Context Settings:")
-        print(f"   - Documents retrieved: {config['context_settings']['default_top_k']}")
-        print(f"   - Context length (tokens): {config['context_settings']['default_context_length']}")
-        print(f"   - Max context chars: {config['context_settings']['max_context_chars']}")
-        
-        print("\n2. Model Settings:")
-        print(f"   - LLM Model: {config['model_settings']['llm_model']}")
-        print(f"   - Embedding Model: {config['model_settings']['embedding_model']}")
-        
-        print("\n3. Debug Settings:")
-        print(f"   - Debug logging: {config['debug_settings']['enable_debug_logging']}")
-        
-        print("\nOptions:")
-        print("1 - Change documents retrieved")
-        print("2 - Change context length")
-        print("3 - Change max context chars")
-        print("4 - Toggle debug logging")
-        print("5 - Save and exit")
-        print("6 - Exit without saving")
+        ctx = config['context_settings']
+        mdl = config['model_settings']
+        dbg = config['debug_settings']
+        print(MENU.format(top_k=ctx['default_top_k'], ctx_len=ctx['default_context_length'],
+                          max_chars=ctx['max_context_chars'], llm=mdl['llm_model'],
+                          emb=mdl['embedding_model'], debug=dbg['enable_debug_logging']))
         
         choice = input("\nEnter your choice (1-6): ").strip()
         
-        if choice == '1':
-            try:
-                new_value = int(input(f"Enter new number of documents (current: {config['context_settings']['default_top_k']}): "))
-                config['context_settings']['default_top_k'] = new_value
-                print(f"✅ Set documents retrieved to {new_value}")
-            except ValueError:
-                print("❌ Please enter a valid number")
-                
-        elif choice == '2':
-            try:
-                new_value = int(input(f"Enter new context length (current: {config['context_settings']['default_context_length']}): "))
-                config['context_settings']['default_context_length'] = new_value
-                print(f"✅ Set context length to {new_value}")
-            except ValueError:
-                print("❌ Please enter a valid number")
-                
-        elif choice == '3':
-            try:
-                new_value = int(input(f"Enter new max context chars (current: {config['context_settings']['max_context_chars']}): "))
-                config['context_settings']['max_context_chars'] = new_value
-                print(f"✅ Set max context chars to {new_value}")
-            except ValueError:
-                print("❌ Please enter a valid number")
-                
-        elif choice == '4':
-            current = config['debug_settings']['enable_debug_logging']
-            config['debug_settings']['enable_debug_logging'] = not current
-            print(f"✅ Toggled debug logging to {not current}")
+        if choice in EDIT_ACTIONS:
+            EDIT_ACTIONS[choice](config)
             
         elif choice == '5':
             if save_qa_config(config):
@@ -81,4 +97,4 @@ def edit_config():
             print("❌ Invalid choice. Please enter 1-6.")
 
 if __name__ == "__main__":
-    edit_config() 
\ No newline at end of file
+    edit_config()
@@ -8,9 +8,9 @@ This script provides a simple interface to interact with the Confluence Q&A syst
 import sys
 import os
 import argparse
-from src.confluence_client import test_confluence_connection
-from src.ingest import ingest_from_confluence, ingest_from_local_docs, ingest_from_config
-from src.query import main as query_main
+import logging
+
+__all__ = ["main"]
 
 def show_help():
     print("""
@@ -36,6 +36,10 @@ Options for ingest commands:
   --no-resume   - Don't resume from previous progress (start fresh)
   --status      - Show ingestion status and progress
   --progress    - Show detailed progress information
+  --workers N   - Number of page fetch workers (default: 8)
+  --no-wait     - Don't wait for Qdrant to index each upserted batch
+  --quantization {none,int8,binary} - Vector quantization for a new collection (default: int8)
+  -v, --verbose - Also show per-page and per-document progress lines (also for ingest-local and query)
 
 Examples:
   python main.py test
@@ -59,51 +63,59 @@ Environment Variables:
   QDRANT_PORT           - Qdrant port (default: 6333)
 """)
 
+def _write_lines(lines):
+    """
+    Write a block of output lines with a single write and flush
+    """
+    sys.stdout.write("\n".join(lines) + "\n")
+    sys.stdout.flush()
+
+def _ingestion_status_lines(progress, format_timestamp):
+    """
+    Build the ingestion status report for a progress snapshot
+    """
+    lines = ["📊 Ingestion Status:"]
+    lines.append(f"  Last run: {progress.get('last_run') or 'Never'}")
+    lines.append(f"  Total documents: {progress.get('total_documents', 0)}")
+    lines.append(f"  Spaces processed: {len(progress.get('processed_spaces') or {})}")
+    lines.append(f"  Pages processed: {progress['page_count']}")
+    if progress["last_processed"]:
+        lines.append(f"  Last page processed: {format_timestamp(progress['last_processed'])}")
+    
+    # Show current progress
+    current_progress = progress.get('current_progress', {})
+    if current_progress:
+        percentage = current_progress.get('percentage_complete', 0.0)
+        current_space = current_progress.get('current_space_index', 0)
+        total_spaces = current_progress.get('total_spaces', 0)
+        current_page = current_progress.get('current_page_index', 0)
+        total_pages = current_progress.get('total_pages', 0)
+        
+        lines.append(f"\n🔄 Current Progress:")
+        lines.append(f"  Progress: {percentage:.1f}% Complete")
+        lines.append(f"  Space: {current_space + 1}/{total_spaces}")
+        lines.append(f"  Page: {current_page + 1}/{total_pages}")
+        
+        if percentage > 0 and percentage < 100:
+            lines.append(f"  ⚠️  Incomplete - can resume from {percentage:.1f}%")
+    
+    if progress.get('last_updated'):
+        lines.append(f"  Last updated: {progress.get('last_updated')}")
+    
+    lines.append("\n📋 Processed Spaces:")
+    for space_key, space_info in (progress.get('processed_spaces') or {}).items():
+        lines.append(f"  - {space_key}: {space_info.get('page_count', 0)} pages")
+    return lines
+
 def show_ingestion_status():
     """
     Show current ingestion status and progress
     """
-    import json
-    import os
-    from datetime import datetime
+    from src.progress_store import progress_exists, load_status_snapshot, format_timestamp
     
-    progress_path = os.path.join("progress", "ingestion_progress.json")
-    
-    if os.path.exists(progress_path):
+    if progress_exists():
         try:
-            with open(progress_path, "r") as f:
-                progress = json.load(f)
-            
-            print("📊 Ingestion Status:")
-            print(f"  Last run: {progress.get('last_run', 'Never')}")
-            print(f"  Total documents: {progress.get('total_documents', 0)}")
-            print(f"  Spaces processed: {len(progress.get('processed_spaces', {}))}")
-            print(f"  Pages processed: {len(progress.get('processed_pages', {}))}")
-            
-            # Show current progress
-            current_progress = progress.get('current_progress', {})
-            if current_progress:
-                percentage = current_progress.get('percentage_complete', 0.0)
-                current_space = current_progress.get('current_space_index', 0)
-                total_spaces = current_progress.get('total_spaces', 0)
-                current_page = current_progress.get('current_page_index', 0)
-                total_pages = current_progress.get('total_pages', 0)
-                
-                print(f"\n🔄 Current Progress:")
-                print(f"  Progress: {percentage:.1f}% Complete")
-                print(f"  Space: {current_space + 1}/{total_spaces}")
-                print(f"  Page: {current_page + 1}/{total_pages}")
-                
-                if percentage > 0 and percentage < 100:
-                    print(f"  ⚠️  Incomplete - can resume from {percentage:.1f}%")
-            
-            if progress.get('last_updated'):
-                print(f"  Last updated: {progress.get('last_updated')}")
-            
-            print("\n📋 Processed Spaces:")
-            for space_key, space_info in progress.get('processed_spaces', {}).items():
-                print(f"  - {space_key}: {space_info.get('page_count', 0)} pages")
-                
+            _write_lines(_ingestion_status_lines(load_status_snapshot(), format_timestamp))
         except Exception as e:
             print(f"❌ Error reading progress: {e}")
     else:
@@ -113,145 +125,189 @@ def show_detailed_progress():
     """
     Show detailed progress information with recent pages
     """
-    import json
-    import os
-    
-    progress_path = os.path.join("progress", "ingestion_progress.json")
+    from src.progress_store import progress_exists, load_status_snapshot, get_recent_pages, format_timestamp
     
-    if os.path.exists(progress_path):
+    if progress_exists():
         try:
-            with open(progress_path, "r") as f:
-                progress = json.load(f)
-            
             # Show basic status
-            show_ingestion_status()
+            progress = load_status_snapshot()
+            lines = _ingestion_status_lines(progress, format_timestamp)
             
             # Show recent pages
-            print("\n📄 Recent Pages Processed:")
-            pages = progress.get('processed_pages', {})
-            recent_pages = list(pages.items())[-20:]  # Show last 20
-            
-            for page_id, page_info in recent_pages:
-                metadata = page_info.get('metadata', {})
-                page_title = metadata.get('page_title', 'Unknown')
-                space_name = metadata.get('space_name', 'Unknown')
-                last_processed = page_info.get('last_processed', 'Unknown')
+            lines.append("\n📄 Recent Pages Processed:")
+            for page_id, last_processed, page_title, space_name in get_recent_pages(limit=20):
+                page_title = page_title or 'Unknown'
+                space_name = space_name or 'Unknown'
                 
-                print(f"  - {page_title} ({space_name}) - {last_processed}")
+                lines.append(f"  - {page_title} ({space_name}) - {format_timestamp(last_processed)}")
             
             # Show space details
-            print("\n🌐 Space Details:")
-            for space_key, space_info in progress.get('processed_spaces', {}).items():
+            lines.append("\n🌐 Space Details:")
+            for space_key, space_info in (progress.get('processed_spaces') or {}).items():
                 page_count = space_info.get('page_count', 0)
                 last_processed = space_info.get('last_processed', 'Unknown')
-                print(f"  - {space_key}: {page_count} pages (last: {last_processed})")
-                
+                lines.append(f"  - {space_key}: {page_count} pages (last: {last_processed})")
+            
+            _write_lines(lines)
         except Exception as e:
             print(f"❌ Error reading detailed progress: {e}")
     else:
         print("📊 No ingestion progress found (first run)")
 
-def main():
-    if len(sys.argv) < 2:
-        show_help()
+def _cmd_help(args):
+    show_help()
+
+def _cmd_test(args):
+    from src.confluence_client import test_confluence_connection
+    print("🔗 Testing Confluence connection...")
+    test_confluence_connection()
+
+def _cmd_ingest(args):
+    from src.ingest import ingest_from_confluence
+    print("📚 Starting Confluence ingestion...")
+    if args.space_key:
+        print(f"📂 Using space key: {args.space_key}")
+    ingest_from_confluence(args.space_key)
+
+def _cmd_ingest_config(args):
+    if args.status:
+        show_ingestion_status()
         return
     
-    command = sys.argv[1].lower()
+    if args.progress:
+        show_detailed_progress()
+        return
     
-    if command == "help":
-        show_help()
+    from src.ingest import ingest_from_config, DEFAULT_WORKERS
+    print("📋 Starting ingestion from configured spaces...")
     
-    elif command == "test":
-        print("🔗 Testing Confluence connection...")
-        test_confluence_connection()
+    # Determine mode
+    if args.incremental:
+        mode = "Incremental"
+    elif args.daily:
+        mode = "Daily"
+    else:
+        mode = "Full"
     
-    elif command == "ingest":
-        # Parse arguments for ingest command
-        parser = argparse.ArgumentParser(description="Ingest documents from Confluence")
-        parser.add_argument("space_key", nargs="?", help="Space key to ingest (optional)")
-        parser.add_argument("--incremental", action="store_true", help="Run in incremental mode")
-        parser.add_argument("--daily", action="store_true", help="Run in daily mode")
-        parser.add_argument("--force", action="store_true", help="Force full ingestion")
-        parser.add_argument("--no-resume", action="store_true", help="Don't resume from previous progress")
-        
-        # Parse only the arguments after "ingest"
-        args = parser.parse_args(sys.argv[2:])
-        
-        space_key = args.space_key
-        print("📚 Starting Confluence ingestion...")
-        if space_key:
-            print(f"📂 Using space key: {space_key}")
-        ingest_from_confluence(space_key)
+    if args.no_resume:
+        mode += " (Fresh Start)"
+    else:
+        mode += " (Resume Enabled)"
     
-    elif command == "ingest-config":
-        # Parse arguments for ingest-config command
-        parser = argparse.ArgumentParser(description="Ingest documents from configured spaces")
-        parser.add_argument("--incremental", action="store_true", help="Run in incremental mode (skip unchanged documents)")
-        parser.add_argument("--daily", action="store_true", help="Run in daily mode (only if last run was >24h ago)")
-        parser.add_argument("--force", action="store_true", help="Force full ingestion even in incremental/daily mode")
-        parser.add_argument("--no-resume", action="store_true", help="Don't resume from previous progress (start fresh)")
-        parser.add_argument("--status", action="store_true", help="Show ingestion status")
-        parser.add_argument("--progress", action="store_true", help="Show detailed progress")
-        
-        # Parse only the arguments after "ingest-config"
-        args = parser.parse_args(sys.argv[2:])
-        
-        if args.status:
-            show_ingestion_status()
-            return
-        
-        if args.progress:
-            show_detailed_progress()
-            return
-        
-        print("📋 Starting ingestion from configured spaces...")
-        
-        # Determine mode
-        if args.incremental:
-            mode = "Incremental"
-        elif args.daily:
-            mode = "Daily"
-        else:
-            mode = "Full"
-        
-        if args.no_resume:
-            mode += " (Fresh Start)"
-        else:
-            mode += " (Resume Enabled)"
-        
-        print(f"Mode: {mode}")
-        ingest_from_config(incremental=args.incremental, daily=args.daily, force=args.force, resume=not args.no_resume)
+    print(f"Mode: {mode}")
+    _configure_logging(args)
+    ingest_from_config(incremental=args.incremental, daily=args.daily, force=args.force, resume=not args.no_resume,
+                       workers=args.workers or DEFAULT_WORKERS, wait=args.wait,
+                       quantization=args.quantization)
+
+def _cmd_ingest_local(args):
+    from src.ingest import ingest_from_local_docs
+    print("📁 Starting local document ingestion...")
+    _configure_logging(args)
+    ingest_from_local_docs()
+
+def _cmd_query(args):
+    from src.query import main as query_main
+    print("🤖 Starting interactive Q&A session...")
+    print("Type 'exit' to quit\n")
+    _configure_logging(args)
+    query_main()
+
+def _cmd_web(args):
+    print("🌐 Starting web-based chat interface...")
+    print("Opening browser to http://localhost:5001")
+    print("Press Ctrl+C to stop the server\n")
+    from web_app import app
+    app.run(debug=False, host='0.0.0.0', port=5001)
+
+def _cmd_config(args):
+    print("🔧 Starting configuration editor...")
+    from edit_config import edit_config
+    edit_config()
+
+def _cmd_status(args):
+    show_ingestion_status()
+
+def _cmd_progress(args):
+    show_detailed_progress()
+
+def _configure_logging(args):
+    """
+    Show the per-page and per-document debug lines of the src modules with -v
+    """
+    if args.verbose:
+        logging.basicConfig(format="%(message)s")
+        logging.getLogger("src").setLevel(logging.DEBUG)
+
+def _add_verbose_flag(parser):
+    parser.add_argument("-v", "--verbose", action="store_true", help="Also show per-page and per-document progress lines")
+
+def _add_ingest_mode_flags(parser):
+    parser.add_argument("--incremental", action="store_true", help="Run in incremental mode (skip unchanged documents)")
+    parser.add_argument("--daily", action="store_true", help="Run in daily mode (only if last run was >24h ago)")
+    parser.add_argument("--force", action="store_true", help="Force full ingestion even in incremental/daily mode")
+    parser.add_argument("--no-resume", action="store_true", help="Don't resume from previous progress (start fresh)")
+
+def build_parser():
+    """
+    Build the command line parser (one subparser per command, imports deferred to the handlers)
+    """
+    parser = argparse.ArgumentParser(prog="main.py", description="Confluence Q&A Bot")
+    subparsers = parser.add_subparsers(dest="command")
     
-    elif command == "ingest-local":
-        print("📁 Starting local document ingestion...")
-        ingest_from_local_docs()
+    sub = subparsers.add_parser("help", help="Show help message")
+    sub.set_defaults(func=_cmd_help)
     
-    elif command == "query":
-        print("🤖 Starting interactive Q&A session...")
-        print("Type 'exit' to quit\n")
-        query_main()
+    sub = subparsers.add_parser("test", help="Test Confluence connection")
+    sub.set_defaults(func=_cmd_test)
     
-    elif command == "web":
-        print("🌐 Starting web-based chat interface...")
-        print("Opening browser to http://localhost:5001")
-        print("Press Ctrl+C to stop the server\n")
-        from web_app import app
-        app.run(debug=False, host='0.0.0.0', port=5001)
+    sub = subparsers.add_parser("ingest", help="Ingest documents from Confluence")
+    sub.add_argument("space_key", nargs="?", help="Space key to ingest (optional)")
+    _add_ingest_mode_flags(sub)
+    sub.set_defaults(func=_cmd_ingest)
     
-    elif command == "config":
-        print("🔧 Starting configuration editor...")
-        from edit_config import edit_config
-        edit_config()
+    sub = subparsers.add_parser("ingest-config", help="Ingest documents from configured spaces (with nested spaces)")
+    _add_ingest_mode_flags(sub)
+    sub.add_argument("--status", action="store_true", help="Show ingestion status")
+    sub.add_argument("--progress", action="store_true", help="Show detailed progress")
+    sub.add_argument("--workers", type=int, default=None, help="Number of page fetch workers (default: 8)")
+    sub.add_argument("--wait", action=argparse.BooleanOptionalAction, default=True,
+                     help="Wait for Qdrant to index each upserted batch (default: wait)")
+    sub.add_argument("--quantization", choices=["none", "int8", "binary"], default="int8",
+                     help="Vector quantization used when creating the collection (default: int8)")
+    _add_verbose_flag(sub)
+    sub.set_defaults(func=_cmd_ingest_config)
     
-    elif command == "status":
-        show_ingestion_status()
+    sub = subparsers.add_parser("ingest-local", help="Ingest documents from local docs folder")
+    _add_verbose_flag(sub)
+    sub.set_defaults(func=_cmd_ingest_local)
     
-    elif command == "progress":
-        show_detailed_progress()
+    sub = subparsers.add_parser("query", help="Start interactive Q&A session")
+    _add_verbose_flag(sub)
+    sub.set_defaults(func=_cmd_query)
     
-    else:
-        print(f"❌ Unknown command: {command}")
+    sub = subparsers.add_parser("web", help="Start web-based chat interface")
+    sub.set_defaults(func=_cmd_web)
+    
+    sub = subparsers.add_parser("config", help="Edit Q&A bot configuration")
+    sub.set_defaults(func=_cmd_config)
+    
+    sub = subparsers.add_parser("status", help="Show ingestion status")
+    sub.set_defaults(func=_cmd_status)
+    
+    sub = subparsers.add_parser("progress", help="Show detailed progress information")
+    sub.set_defaults(func=_cmd_progress)
+    
+    return parser
+
+def main():
+    args = build_parser().parse_args()
+    
+    if args.command is None:
         show_help()
+        return
+    
+    args.func(args)
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -1,10 +1,56 @@
 # src/config_loader.py
 
+import copy
 import json
 import os
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 DEFAULT_CONFIG_PATH = "config/qa_config.json"
+SPACES_CONFIG_PATH = "config/spaces.json"
+
+# Parsed config files keyed by path, with the mtime they were read at
+_CONFIG_CACHE: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+
+def _load_cached_config(config_path: str) -> Optional[Dict[str, Any]]:
+    """
+    Get the parsed configuration file, re-reading it only when its mtime changes.
+    
+    Args:
+        config_path: Path to the configuration file
+        
+    Returns:
+        The cached configuration dictionary (do not modify), or None if the file does not exist
+    """
+    try:
+        mtime = os.stat(config_path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    
+    cached = _CONFIG_CACHE.get(config_path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    
+    if orjson is not None:
+        with open(config_path, 'rb') as f:
+            config = orjson.loads(f.read())
+    else:
+        with open(config_path, 'r') as f:
+            config = json.load(f)
+    
+    _CONFIG_CACHE[config_path] = (mtime, config)
+    print(f"✅ Loaded configuration from {config_path}")
+    return config
+
+def clear_config_cache() -> None:
+    """
+    Drop all cached configuration files so the next load re-reads them from disk.
+    """
+    _CONFIG_CACHE.clear()
 
 def load_qa_config(config_path: str = DEFAULT_CONFIG_PATH) -> Dict[str, Any]:
     """
@@ -17,21 +63,38 @@ def load_qa_config(config_path: str = DEFAULT_CONFIG_PATH) -> Dict[str, Any]:
         Dictionary containing configuration settings
     """
     try:
-        if not os.path.exists(config_path):
+        config = _load_cached_config(config_path)
+        if config is None:
             print(f"⚠️ Configuration file not found at {config_path}, using defaults")
             return get_default_config()
         
-        with open(config_path, 'r') as f:
-            config = json.load(f)
-        
-        print(f"✅ Loaded configuration from {config_path}")
-        return config
+        # Callers may edit the returned dict, so hand out a copy of the cached one
+        return copy.deepcopy(config)
         
     except Exception as e:
         print(f"❌ Error loading configuration: {e}")
         print("Using default configuration")
         return get_default_config()
 
+def load_spaces_config(config_path: str = SPACES_CONFIG_PATH) -> List[Dict[str, Any]]:
+    """
+    Load the configured Confluence spaces, parsed only when the file changes.
+    
+    Args:
+        config_path: Path to the spaces file
+        
+    Returns:
+        List of space definitions
+        
+    Raises:
+        FileNotFoundError: If the spaces file does not exist
+    """
+    spaces = _load_cached_config(config_path)
+    if spaces is None:
+        raise FileNotFoundError(f"Spaces file not found: {config_path}")
+    
+    return copy.deepcopy(spaces)
+
 def get_default_config() -> Dict[str, Any]:
     """
     Get default configuration settings.
@@ -41,6 +104,8 @@ def get_default_config() -> Dict[str, Any]:
             "default_top_k": 10,
             "default_context_length": 16384,
             "max_context_chars": 50000,
+            "hnsw_ef": 128,
+            "oversampling": 2.0,
             "description": "Number of documents to retrieve for context"
         },
         "model_settings": {
@@ -74,8 +139,13 @@ def save_qa_config(config: Dict[str, Any], config_path: str = DEFAULT_CONFIG_PAT
         # Ensure config directory exists
         os.makedirs(os.path.dirname(config_path), exist_ok=True)
         
-        with open(config_path, 'w') as f:
-            json.dump(config, f, indent=2)
+        if orjson is not None:
+            with open(config_path, 'wb') as f:
+                f.write(orjson.dumps(config, option=orjson.OPT_INDENT_2))
+        else:
+            with open(config_path, 'w') as f:
+                json.dump(config, f, indent=2)
+        _CONFIG_CACHE.pop(config_path, None)
         
         print(f"✅ Configuration saved to {config_path}")
         return True
@@ -124,7 +194,7 @@ def get_config_value(section: str, key: str, config_path: str = DEFAULT_CONFIG_P
         Configuration value or None if not found
     """
     try:
-        config = load_qa_config(config_path)
+        config = _load_cached_config(config_path) or get_default_config()
         return config.get(section, {}).get(key)
     except Exception as e:
         print(f"❌ Error getting configuration value: {e}")
@@ -1,17 +1,143 @@
 # src/confluence_client.py
 
 import requests
+from requests.adapters import HTTPAdapter
+from requests.auth import HTTPBasicAuth
+from urllib3.util.retry import Retry
 import os
-import base64
+import logging
+import shutil
 import tempfile
-from typing import List, Dict, Any
+from typing import List, Dict, Any, BinaryIO, Iterable, Iterator, Union
 from dotenv import load_dotenv
-import PyPDF2
 import io
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+# PDFium (native) text extraction when available, PyPDF2 as the fallback
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
+
+try:
+    import PyPDF2
+except ImportError:
+    PyPDF2 = None
+
+# orjson for decoding (large) API responses when available
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Lexbor (C) HTML parsing when available, BeautifulSoup as the fallback
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+    from bs4 import BeautifulSoup
 
 # Load environment variables from .env file
 load_dotenv()
 
+log = logging.getLogger(__name__)
+
+# Concurrent PDF downloads per page
+ATTACHMENT_WORKERS = 8
+
+# Pages per CQL search when looking up attachments in bulk
+ATTACHMENT_LOOKUP_BATCH = 50
+
+# Attachment downloads larger than this are spooled to disk instead of memory
+DOWNLOAD_SPOOL_SIZE = 8 * 1024 * 1024
+
+# Concurrent requests when paging through content listings
+PAGINATION_WORKERS = 8
+
+# Listings only expand metadata; page bodies are fetched per page when needed (load_page_body)
+LIST_EXPAND = "version,space"
+
+# Pass as `headers=` on POST/PUT calls that send a JSON body
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+def _extract_text_from_html(html: str) -> str:
+    """
+    Extract clean text from Confluence storage HTML.
+    """
+    if LexborHTMLParser is not None:
+        # Parse with the Lexbor (C) HTML parser
+        tree = LexborHTMLParser(html)
+        # Remove script and style elements
+        for node in tree.css("script, style"):
+            node.decompose()
+        text = tree.text(separator="", strip=False)
+    else:
+        # Clean HTML content using BeautifulSoup
+        soup = BeautifulSoup(html, 'html.parser')
+        # Remove script and style elements
+        for script in soup(["script", "style"]):
+            script.decompose()
+        # Get text and clean up whitespace
+        text = soup.get_text()
+    # Collapse all runs of whitespace (including newlines) into single spaces
+    return ' '.join(text.split())
+
+def parse_json(response) -> Any:
+    """
+    Decode a JSON response body (orjson when available, falling back to requests' decoder)
+    """
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
+
+def _extract_text_pdfium(pdf_file: BinaryIO) -> str:
+    """
+    Extract text content from a PDF file with PDFium.
+    """
+    pdf = pdfium.PdfDocument(pdf_file)
+    try:
+        texts = []
+        for page in pdf:
+            textpage = page.get_textpage()
+            texts.append(textpage.get_text_range())
+            textpage.close()
+            page.close()
+        return "\n".join(texts).strip()
+    finally:
+        pdf.close()
+
+def _extract_pdf_text(pdf_content: Union[bytes, BinaryIO]) -> str:
+    """
+    Extract text content from a PDF (module-level so it can run in a process pool).
+    """
+    pdf_file = io.BytesIO(pdf_content) if isinstance(pdf_content, bytes) else pdf_content
+    
+    if pdfium is not None:
+        return _extract_text_pdfium(pdf_file)
+    
+    pdf_reader = PyPDF2.PdfReader(pdf_file)
+    
+    text = ""
+    for page in pdf_reader.pages:
+        text += page.extract_text() + "\n"
+    
+    return text.strip()
+
+def extract_pdf_file_text(filepath: str) -> str:
+    """
+    Extract text content from a PDF file on disk; the file is read as pages are parsed
+    instead of being loaded into memory first.
+    """
+    with open(filepath, "rb") as pdf_file:
+        return _extract_pdf_text(pdf_file)
+
+def is_pdf_attachment(attachment: Dict[str, Any]) -> bool:
+    """
+    Check whether an attachment is a PDF (the only attachments that are ingested).
+    """
+    return attachment.get("title", "").lower().endswith('.pdf')
+
 class ConfluenceClient:
     def __init__(self):
         self.base_url = os.getenv("CONFLUENCE_BASE_URL")
@@ -21,57 +147,158 @@ class ConfluenceClient:
         if not all([self.base_url, self.username, self.api_token]):
             raise ValueError("Missing Confluence environment variables. Please set CONFLUENCE_BASE_URL, CONFLUENCE_USERNAME, and CONFLUENCE_API_TOKEN")
         
-        # Create Basic Auth header
-        credentials = f"{self.username}:{self.api_token}"
-        encoded_credentials = base64.b64encode(credentials.encode()).decode()
-        
+        # Default headers for every request; Content-Type is only sent with write calls (JSON_HEADERS)
         self.headers = {
-            "Authorization": f"Basic {encoded_credentials}",
-            "Content-Type": "application/json"
+            "Accept": "application/json"
         }
+        
+        # One pooled session for all requests, so connections (and TLS handshakes) are reused
+        self.session = requests.Session()
+        self.session.auth = HTTPBasicAuth(self.username, self.api_token)
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=32,
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        
+        # Optional process pool for CPU-bound PDF text extraction (set by the ingestion)
+        self.pdf_executor = None
     
-    def get_all_pages(self, space_key: str = None, limit: int = 100) -> List[Dict[str, Any]]:
+    def _fetch_pages_batch(self, space_key: str, start: int, limit: int) -> Dict[str, Any]:
         """
-        Get all pages from Confluence, optionally filtered by space key.
+        Fetch one page of the content listing starting at `start`.
         """
-        pages = []
-        start = 0
+        url = f"{self.base_url}/rest/api/content"
+        params = {
+            "type": "page",
+            "limit": limit,
+            "start": start,
+            "expand": LIST_EXPAND
+        }
+        
+        if space_key:
+            params["spaceKey"] = space_key
+        
+        response = self.session.get(url, params=params)
+        response.raise_for_status()
+        
+        return parse_json(response)
+    
+    def iter_all_pages(self, space_key: str = None, limit: int = 100) -> Iterator[Dict[str, Any]]:
+        """
+        Yield all pages from Confluence, optionally filtered by space key, as each
+        listing request completes. Pages come without their body; see load_page_body.
         
+        The first request determines the page size; the remaining listing pages are
+        fetched concurrently (all at once when the server reports totalSize, otherwise
+        in windows of PAGINATION_WORKERS until a short page marks the end).
+        """
         # Use a reasonable default limit if None is provided
         if limit is None:
             limit = 1000  # Large number to get all pages
         
-        while True:
-            url = f"{self.base_url}/rest/api/content"
-            params = {
-                "type": "page",
-                "limit": limit,
-                "start": start,
-                "expand": "body.storage,version,space"
-            }
-            
-            if space_key:
-                params["spaceKey"] = space_key
+        data = self._fetch_pages_batch(space_key, 0, limit)
+        pages = data.get("results", [])
+        yield from pages
+        
+        # Check if there are more pages
+        if not pages or not data.get("_links", {}).get("next"):
+            return
+        
+        # The server may cap the page size below `limit`, so step by what it actually returned
+        page_size = len(pages)
+        fetch = lambda start: self._fetch_pages_batch(space_key, start, limit)
+        
+        with ThreadPoolExecutor(max_workers=PAGINATION_WORKERS) as executor:
+            total_size = data.get("totalSize")
+            if total_size is not None:
+                for batch in executor.map(fetch, range(page_size, total_size, page_size)):
+                    yield from batch.get("results", [])
+                return
             
-            response = requests.get(url, headers=self.headers, params=params)
+            start = page_size
+            while True:
+                window = range(start, start + page_size * PAGINATION_WORKERS, page_size)
+                for batch in executor.map(fetch, window):
+                    results = batch.get("results", [])
+                    yield from results
+                    if len(results) < page_size or not batch.get("_links", {}).get("next"):
+                        return
+                start += page_size * PAGINATION_WORKERS
+    
+    def get_all_pages(self, space_key: str = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Get all pages from Confluence, optionally filtered by space key (see iter_all_pages).
+        """
+        return list(self.iter_all_pages(space_key=space_key, limit=limit))
+    
+    def search_all_pages_cql(self, space_key: str, limit: int = 250) -> List[Dict[str, Any]]:
+        """
+        Get every page of a space with one paginated CQL search, including each page's
+        ancestors so the page tree can be rebuilt without per-parent requests.
+        Pages come without their body; see load_page_body.
+        """
+        url = f"{self.base_url}/rest/api/content/search"
+        params = {
+            "cql": f'type = page AND space = "{space_key}"',
+            "limit": limit,
+            "expand": f"{LIST_EXPAND},ancestors"
+        }
+        
+        pages = []
+        while url:
+            response = self.session.get(url, params=params)
             response.raise_for_status()
             
-            data = response.json()
-            results = data.get("results", [])
-            
-            if not results:
-                break
-                
-            pages.extend(results)
+            data = parse_json(response)
+            pages.extend(data.get("results", []))
             
-            # Check if there are more pages
-            if not data.get("_links", {}).get("next"):
-                break
-                
-            start += limit
+            # Follow the cursor link (it already carries the query)
+            next_link = data.get("_links", {}).get("next")
+            url = f"{data['_links'].get('base', self.base_url)}{next_link}" if next_link else None
+            params = None
         
         return pages
     
+    def get_attachments_for_pages(self, page_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Get the attachments of many pages with one CQL search per ATTACHMENT_LOOKUP_BATCH pages.
+        Returns a dict of page id -> attachments, or None if the search failed.
+        """
+        try:
+            attachments = {page_id: [] for page_id in page_ids}
+            for i in range(0, len(page_ids), ATTACHMENT_LOOKUP_BATCH):
+                containers = " OR ".join(f'container = "{page_id}"' for page_id in page_ids[i:i + ATTACHMENT_LOOKUP_BATCH])
+                url = f"{self.base_url}/rest/api/content/search"
+                params = {
+                    "cql": f"type = attachment AND ({containers})",
+                    "limit": 100,
+                    "expand": "container,version"
+                }
+                
+                while url:
+                    response = self.session.get(url, params=params)
+                    response.raise_for_status()
+                    
+                    data = parse_json(response)
+                    for attachment in data.get("results", []):
+                        page_id = attachment.get("container", {}).get("id")
+                        attachments.setdefault(page_id, []).append(attachment)
+                    
+                    # Follow the cursor link (it already carries the query)
+                    next_link = data.get("_links", {}).get("next")
+                    url = f"{data['_links'].get('base', self.base_url)}{next_link}" if next_link else None
+                    params = None
+            
+            return attachments
+            
+        except Exception as e:
+            print(f"Error getting attachments for {len(page_ids)} pages: {e}")
+            return None
+    
     def get_page_attachments(self, page_id: str) -> List[Dict[str, Any]]:
         """
         Get all attachments for a specific page.
@@ -83,19 +310,21 @@ class ConfluenceClient:
                 "expand": "version"
             }
             
-            response = requests.get(url, headers=self.headers, params=params)
+            response = self.session.get(url, params=params)
             response.raise_for_status()
             
-            data = response.json()
+            data = parse_json(response)
             return data.get("results", [])
             
         except Exception as e:
             print(f"Error getting attachments for page {page_id}: {e}")
             return []
     
-    def download_attachment(self, attachment: Dict[str, Any]) -> bytes:
+    def download_attachment(self, attachment: Dict[str, Any]) -> BinaryIO:
         """
-        Download an attachment file.
+        Download an attachment file into a temporary file (kept in memory up to
+        DOWNLOAD_SPOOL_SIZE, spilled to disk beyond that), positioned at the start.
+        The caller is responsible for closing it.
         """
         try:
             download_url = attachment.get("_links", {}).get("download")
@@ -106,28 +335,39 @@ class ConfluenceClient:
             if download_url.startswith("/"):
                 download_url = f"{self.base_url}{download_url}"
             
-            response = requests.get(download_url, headers=self.headers)
-            response.raise_for_status()
+            with self.session.get(download_url, stream=True) as response:
+                response.raise_for_status()
+                
+                buffer = tempfile.SpooledTemporaryFile(max_size=DOWNLOAD_SPOOL_SIZE)
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    buffer.write(chunk)
             
-            return response.content
+            buffer.seek(0)
+            return buffer
             
         except Exception as e:
             print(f"Error downloading attachment {attachment.get('title')}: {e}")
             return None
     
-    def extract_text_from_pdf(self, pdf_content: bytes) -> str:
+    def extract_text_from_pdf(self, pdf_content: Union[bytes, BinaryIO]) -> str:
         """
-        Extract text content from a PDF file.
+        Extract text content from a PDF file (raw bytes or a seekable binary file).
+        Runs on `pdf_executor` (a process pool) when one is set, in this process otherwise;
+        the worker gets the PDF as a temporary file on disk rather than as pickled bytes.
         """
         try:
-            pdf_file = io.BytesIO(pdf_content)
-            pdf_reader = PyPDF2.PdfReader(pdf_file)
-            
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
+            if self.pdf_executor is not None:
+                with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as pdf_file:
+                    if isinstance(pdf_content, bytes):
+                        pdf_file.write(pdf_content)
+                    else:
+                        shutil.copyfileobj(pdf_content, pdf_file)
+                try:
+                    return self.pdf_executor.submit(extract_pdf_file_text, pdf_file.name).result()
+                finally:
+                    os.unlink(pdf_file.name)
             
-            return text.strip()
+            return _extract_pdf_text(pdf_content)
             
         except Exception as e:
             print(f"Error extracting text from PDF: {e}")
@@ -142,10 +382,26 @@ class ConfluenceClient:
             "expand": "body.storage,version,space"
         }
         
-        response = requests.get(url, headers=self.headers, params=params)
+        response = self.session.get(url, params=params)
         response.raise_for_status()
         
-        return response.json()
+        return parse_json(response)
+    
+    def load_page_body(self, page: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Fill in the storage body of a page that was listed without it (in place).
+        """
+        if "body" not in page:
+            page["body"] = self.get_page_content(page["id"]).get("body", {})
+        return page
+    
+    def load_page_bodies(self, pages: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Fetch the storage bodies of many pages concurrently. `pages` may be a
+        generator (e.g. iter_all_pages), bodies start loading as pages arrive.
+        """
+        with ThreadPoolExecutor(max_workers=PAGINATION_WORKERS) as executor:
+            return list(executor.map(self.load_page_body, pages))
     
     def search_pages(self, query: str, space_key: str = None) -> List[Dict[str, Any]]:
         """
@@ -155,16 +411,16 @@ class ConfluenceClient:
         params = {
             "cql": f'text ~ "{query}"',
             "limit": 50,
-            "expand": "body.storage,version,space"
+            "expand": LIST_EXPAND
         }
         
         if space_key:
             params["cql"] = f'space = "{space_key}" AND text ~ "{query}"'
         
-        response = requests.get(url, headers=self.headers, params=params)
+        response = self.session.get(url, params=params)
         response.raise_for_status()
         
-        return response.json().get("results", [])
+        return self.load_page_bodies(parse_json(response).get("results", []))
     
     def extract_text_content(self, page: Dict[str, Any]) -> str:
         """
@@ -174,20 +430,8 @@ class ConfluenceClient:
             # Get the storage content (HTML)
             storage_content = page.get("body", {}).get("storage", {}).get("value", "")
             
-            # Clean HTML content using BeautifulSoup
-            from bs4 import BeautifulSoup
             if storage_content:
-                soup = BeautifulSoup(storage_content, 'html.parser')
-                # Remove script and style elements
-                for script in soup(["script", "style"]):
-                    script.decompose()
-                # Get text and clean up whitespace
-                text = soup.get_text()
-                # Clean up extra whitespace and newlines
-                lines = (line.strip() for line in text.splitlines())
-                chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-                text = ' '.join(chunk for chunk in chunks if chunk)
-                return text
+                return _extract_text_from_html(storage_content)
             
             return ""
             
@@ -195,65 +439,85 @@ class ConfluenceClient:
             print(f"Error extracting content from page {page.get('id')}: {e}")
             return ""
     
-    def get_page_with_attachments(self, page: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def get_page_with_attachments(self, page: Dict[str, Any], attachments: List[Dict[str, Any]] = None,
+                                  failed_attachments: List[str] = None) -> List[Dict[str, Any]]:
         """
         Get a page and all its PDF attachments as separate documents.
+        Pass `attachments` when they were already fetched in bulk (see get_attachments_for_pages).
+        The titles of PDFs that could not be downloaded or yielded no text are added to `failed_attachments`.
         """
         documents = []
         
+        # Fields shared by the page and all of its attachments (space may be missing)
+        space_obj = page.get("space") or {}
+        page_fields = {
+            "space_key": space_obj.get("key", "unknown"),
+            "url": f"{self.base_url}/pages/viewpage.action?pageId={page['id']}",
+            "version": (page.get("version") or {}).get("number", 1)
+        }
+        
         # Add the main page content
         text_content = self.extract_text_content(page)
         if text_content.strip():
-            # Handle cases where space field might be missing
-            space_key = page.get("space", {}).get("key") if page.get("space") else "unknown"
-            
             documents.append({
                 "id": page["id"],
                 "title": page["title"],
-                "space_key": space_key,
+                "space_key": page_fields["space_key"],
                 "text": text_content,
-                "url": f"{self.base_url}/pages/viewpage.action?pageId={page['id']}",
-                "version": page.get("version", {}).get("number", 1),
+                "url": page_fields["url"],
+                "version": page_fields["version"],
                 "type": "page"
             })
         
-        # Get and process attachments
-        attachments = self.get_page_attachments(page["id"])
-        for attachment in attachments:
-            attachment_title = attachment.get("title", "")
-            
-            # Only process PDF attachments
-            if attachment_title.lower().endswith('.pdf'):
-                print(f"    📎 Processing PDF attachment: {attachment_title}")
-                
-                # Download the PDF
-                pdf_content = self.download_attachment(attachment)
-                if pdf_content:
-                    # Extract text from PDF
-                    pdf_text = self.extract_text_from_pdf(pdf_content)
-                    if pdf_text.strip():
-                        # Handle cases where space field might be missing
-                        space_key = page.get("space", {}).get("key") if page.get("space") else "unknown"
-                        
-                        documents.append({
-                            "id": f"{page['id']}_{attachment['id']}",
-                            "title": f"{page['title']} - {attachment_title}",
-                            "space_key": space_key,
-                            "text": pdf_text,
-                            "url": f"{self.base_url}/pages/viewpage.action?pageId={page['id']}",
-                            "version": page.get("version", {}).get("number", 1),
-                            "type": "pdf_attachment",
-                            "attachment_id": attachment["id"],
-                            "attachment_title": attachment_title
-                        })
-                        print(f"      ✅ Extracted {len(pdf_text)} characters from PDF")
-                    else:
-                        print(f"      ⚠️ No text extracted from PDF: {attachment_title}")
-                else:
-                    print(f"      ❌ Failed to download PDF: {attachment_title}")
+        # Get and process PDF attachments, downloading and extracting them concurrently
+        if attachments is None:
+            attachments = self.get_page_attachments(page["id"])
+        pdf_attachments = [a for a in attachments if is_pdf_attachment(a)]
+        if len(pdf_attachments) > 1:
+            with ThreadPoolExecutor(max_workers=min(ATTACHMENT_WORKERS, len(pdf_attachments))) as executor:
+                pdf_documents = list(executor.map(lambda a: self._download_and_extract(page, a, page_fields), pdf_attachments))
+        else:
+            pdf_documents = [self._download_and_extract(page, a, page_fields) for a in pdf_attachments]
         
+        documents.extend(doc for doc in pdf_documents if doc is not None)
+        if failed_attachments is not None:
+            failed_attachments.extend(a.get("title", "") for a, doc in zip(pdf_attachments, pdf_documents) if doc is None)
         return documents
     
+    def _download_and_extract(self, page: Dict[str, Any], attachment: Dict[str, Any], page_fields: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Download a PDF attachment and turn it into a document, or None if it has no text.
+        `page_fields` holds the space_key, url and version computed once for the page.
+        """
+        attachment_title = attachment.get("title", "")
+        log.debug("📎 Processing PDF attachment: %s", attachment_title)
+        
+        # Download the PDF
+        pdf_file = self.download_attachment(attachment)
+        if pdf_file is None:
+            print(f"      ❌ Failed to download PDF: {attachment_title}")
+            return None
+        
+        # Extract text from PDF
+        with pdf_file:
+            pdf_text = self.extract_text_from_pdf(pdf_file)
+        if not pdf_text.strip():
+            print(f"      ⚠️ No text extracted from PDF: {attachment_title}")
+            return None
+        
+        log.debug("✅ Extracted %d characters from PDF: %s", len(pdf_text), attachment_title)
+        return {
+            "id": f"{page['id']}_{attachment['id']}",
+            "title": f"{page['title']} - {attachment_title}",
+            "space_key": page_fields["space_key"],
+            "text": pdf_text,
+            "url": page_fields["url"],
+            "version": page_fields["version"],
+            "type": "pdf_attachment",
+            "attachment_id": attachment["id"],
+            "attachment_title": attachment_title
+        }
+    
     def get_child_spaces(self, parent_space_key: str) -> List[Dict[str, Any]]:
         """
         Get child spaces of a parent space.
@@ -266,10 +530,10 @@ class ConfluenceClient:
                 "spaceKey": parent_space_key
             }
             
-            response = requests.get(url, headers=self.headers, params=params)
+            response = self.session.get(url, params=params)
             response.raise_for_status()
             
-            data = response.json()
+            data = parse_json(response)
             return data.get("results", [])
         except Exception as e:
             print(f"Error getting child spaces for {parent_space_key}: {e}")
@@ -291,10 +555,10 @@ class ConfluenceClient:
                 "expand": "description.plain"
             }
             
-            response = requests.get(url, headers=self.headers, params=params)
+            response = self.session.get(url, params=params)
             response.raise_for_status()
             
-            data = response.json()
+            data = parse_json(response)
             results = data.get("results", [])
             
             if not results:
@@ -314,24 +578,34 @@ class ConfluenceClient:
         """
         Get all pages and format them for ingestion into the vector database.
         """
-        pages = self.get_all_pages(space_key=space_key)
+        pages = self.load_page_bodies(self.iter_all_pages(space_key=space_key))
         
         formatted_pages = []
+        page_url = f"{self.base_url}/pages/viewpage.action?pageId="
         for page in pages:
             text_content = self.extract_text_content(page)
             if text_content.strip():  # Only include pages with content
+                page_id = page["id"]
                 formatted_pages.append({
-                    "id": page["id"],
+                    "id": page_id,
                     "title": page["title"],
                     "space_key": page["space"]["key"],
                     "text": text_content,
-                    "url": f"{self.base_url}/pages/viewpage.action?pageId={page['id']}",
+                    "url": page_url + page_id,
                     "version": page["version"]["number"]
                 })
         
         return formatted_pages
 
 
+@lru_cache(maxsize=1)
+def get_client() -> ConfluenceClient:
+    """
+    Get the process-wide ConfluenceClient, so repeated runs reuse its warm connection pool.
+    """
+    return ConfluenceClient()
+
+
 def test_confluence_connection():
     """
     Test function to verify Confluence connection and get sample pages.
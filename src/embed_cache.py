@@ -0,0 +1,78 @@
+# src/embed_cache.py
+
+import os
+import sqlite3
+import hashlib
+import threading
+from array import array
+
+EMBED_CACHE_DIR = "progress"
+EMBED_CACHE_PATH = os.path.join(EMBED_CACHE_DIR, "embeddings.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    text_hash BLOB PRIMARY KEY,
+    vector BLOB
+);
+"""
+
+_connection = None
+_lock = threading.Lock()
+
+def get_connection():
+    """
+    Open (once per process) the embedding cache database in WAL mode
+    """
+    global _connection
+    with _lock:
+        if _connection is None:
+            os.makedirs(EMBED_CACHE_DIR, exist_ok=True)
+            conn = sqlite3.connect(EMBED_CACHE_PATH, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            _connection = conn
+    return _connection
+
+def text_key(model, text):
+    """
+    Cache key of a text embedded with a given model
+    """
+    digest = hashlib.blake2b(model.encode("utf-8"), digest_size=16)
+    digest.update(b"\0")
+    digest.update(text.encode("utf-8"))
+    return digest.digest()
+
+def get_vectors(keys):
+    """
+    Get the cached vectors (lists of floats) for the given keys, as a dict of the keys found
+    """
+    if not keys:
+        return {}
+    conn = get_connection()
+    placeholders = ",".join("?" for _ in keys)
+    with _lock:
+        rows = conn.execute(f"SELECT text_hash, vector FROM embeddings WHERE text_hash IN ({placeholders})", list(keys)).fetchall()
+    return {key: array("f", vector).tolist() for key, vector in rows}
+
+def put_vectors(items):
+    """
+    Store (key, vector) pairs; vectors are kept as float32
+    A failed write is rolled back (so the shared connection stays usable) and re-raised;
+    get_embeddings only logs it, since the cache is best effort
+    """
+    if not items:
+        return
+    conn = get_connection()
+    with _lock:
+        conn.execute("BEGIN")
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (text_hash, vector) VALUES (?, ?)",
+                [(key, array("f", vector).tobytes()) for key, vector in items]
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
@@ -6,6 +6,21 @@ Response formatting utilities for the Confluence Q&A Bot
 import re
 from typing import List, Dict, Any
 
+# Patterns used by the formatters, compiled once
+_NUMBERED_LINE = re.compile(r'^(\d+)\.\s*(.+)$')
+_BULLET = re.compile(r'^[-*•]\s*(.+)$')
+_INLINE_NUM = re.compile(r'\d+\.\s+[A-Z][^:]*:')
+_NUMBERED_HEADER = re.compile(r'^\d+\.\s+[A-Z][^:]*:')
+_NUMBERED_ITEM = re.compile(r'^(\d+)\.\s+([^:]+):\s*(.*)')
+_INLINE_ITEM = re.compile(r'(\d+)\.\s+([^:]+?):\s*(.*?)(?=\s*\d+\.\s+[^:]+:|\Z)', re.DOTALL)
+
+# Keywords that mark a response as a technical list
+_TECH_KEYWORDS = ('list', 'columns', 'fields', 'properties')
+
+# Keywords for section headers and column definitions in grid column responses
+_SECTION_KEYWORDS = ('recent columns', 'visible columns', 'active columns', 'group')
+_COLUMN_KEYWORDS = ('index', 'field', 'type')
+
 def format_technical_list(text: str, title: str = None) -> str:
     """
     Format a technical list with proper structure
@@ -29,28 +44,27 @@ def format_technical_list(text: str, title: str = None) -> str:
             continue
             
         # Check if it's a numbered item
-        numbered_match = re.match(r'^(\d+)\.\s*(.+)$', line)
+        numbered_match = _NUMBERED_LINE.match(line)
         if numbered_match:
             number = numbered_match.group(1)
             content = numbered_match.group(2)
-            formatted_lines.append(f"{number}. **{content.split(':')[0]}**: {content.split(':', 1)[1] if ':' in content else content}")
+            label, sep, rest = content.partition(':')
+            formatted_lines.append(f"{number}. **{label}**: {rest if sep else content}")
             continue
         
         # Check if it's a bullet point
-        bullet_match = re.match(r'^[-*•]\s*(.+)$', line)
+        bullet_match = _BULLET.match(line)
         if bullet_match:
             content = bullet_match.group(1)
-            formatted_lines.append(f"• **{content.split(':')[0]}**: {content.split(':', 1)[1] if ':' in content else content}")
+            label, sep, rest = content.partition(':')
+            formatted_lines.append(f"• **{label}**: {rest if sep else content}")
             continue
         
         # Check if it contains technical data (field: value pattern)
         if ':' in line and any(keyword in line.lower() for keyword in ['field', 'type', 'index', 'data']):
-            parts = line.split(':', 1)
-            if len(parts) == 2:
-                label = parts[0].strip()
-                value = parts[1].strip()
-                formatted_lines.append(f"**{label}**: {value}")
-                continue
+            label, _, value = line.partition(':')
+            formatted_lines.append(f"**{label.strip()}**: {value.strip()}")
+            continue
         
         # Regular line
         formatted_lines.append(line)
@@ -62,7 +76,11 @@ def format_grid_columns(text: str) -> str:
     """
     Special formatter for grid columns data
     """
-    if not text or 'grid' not in text.lower() or 'column' not in text.lower():
+    if not text:
+        return text
+    
+    lowered_full = text.lower()
+    if 'grid' not in lowered_full or 'column' not in lowered_full:
         return text
     
     # Extract column information
@@ -76,9 +94,10 @@ def format_grid_columns(text: str) -> str:
         line = line.strip()
         if not line:
             continue
+        lowered = line.lower()
         
         # Check for section headers
-        if any(keyword in line.lower() for keyword in ['recent columns', 'visible columns', 'active columns', 'group']):
+        if any(keyword in lowered for keyword in _SECTION_KEYWORDS):
             # Save previous section
             if current_section and current_items:
                 formatted_sections.append(f"## {current_section}\n" + '\n'.join(current_items))
@@ -88,7 +107,7 @@ def format_grid_columns(text: str) -> str:
             continue
         
         # Check for column definitions
-        if '(' in line and ')' in line and any(keyword in line.lower() for keyword in ['index', 'field', 'type']):
+        if '(' in line and ')' in line and any(keyword in lowered for keyword in _COLUMN_KEYWORDS):
             # Extract column name and details
             parts = line.split('(', 1)
             if len(parts) == 2:
@@ -100,8 +119,8 @@ def format_grid_columns(text: str) -> str:
                 formatted_details = []
                 for detail in detail_parts:
                     detail = detail.strip()
-                    if ':' in detail:
-                        key, value = detail.split(':', 1)
+                    key, sep, value = detail.partition(':')
+                    if sep:
                         formatted_details.append(f"**{key.strip()}**: {value.strip()}")
                     else:
                         formatted_details.append(detail)
@@ -130,22 +149,24 @@ def enhance_response_formatting(text: str) -> str:
         return text
     
     # Check for numbered list format first (like "1. Flight Number: This column...")
-    if re.search(r'\d+\.\s+[A-Z][^:]*:', text):
+    if _INLINE_NUM.search(text):
         return format_numbered_list(text)
     
+    lowered = text.lower()
+    
     # Check if it's grid columns data (for different format)
-    if 'grid' in text.lower() and 'column' in text.lower():
+    if 'grid' in lowered and 'column' in lowered:
         return format_grid_columns(text)
     
     # Check if it's a technical list
-    if any(keyword in text.lower() for keyword in ['list', 'columns', 'fields', 'properties']):
+    if any(keyword in lowered for keyword in _TECH_KEYWORDS):
         return format_technical_list(text)
     
     # General formatting improvements
     formatted = text
     
     # Add section headers if missing
-    if 'overview' not in text.lower() and len(text) > 200:
+    if 'overview' not in lowered and len(text) > 200:
         lines = text.split('\n')
         if len(lines) > 5:
             # Add overview section
@@ -164,7 +185,7 @@ def format_numbered_list(text: str) -> str:
         return text
     
     # Check if the text contains inline numbered lists (all in one paragraph)
-    if re.search(r'\d+\.\s+[A-Z][^:]*:', text):
+    if _INLINE_NUM.search(text):
         return format_inline_numbered_list(text)
     
     lines = text.split('\n')
@@ -181,7 +202,7 @@ def format_numbered_list(text: str) -> str:
             continue
         
         # Check if this line starts a numbered list
-        if re.match(r'^\d+\.\s+[A-Z][^:]*:', line):
+        if _NUMBERED_HEADER.match(line):
             in_numbered_section = True
             numbered_lines.append(line)
         elif in_numbered_section:
@@ -192,33 +213,33 @@ def format_numbered_list(text: str) -> str:
             intro_lines.append(line)
     
     # Format the response
-    formatted = ""
+    parts = []
     
     # Add introduction as overview
     if intro_lines:
-        formatted += "## Overview\n"
-        formatted += '\n'.join(intro_lines)
-        formatted += "\n\n"
+        parts.append("## Overview\n")
+        parts.append('\n'.join(intro_lines))
+        parts.append("\n\n")
     
     # Add numbered list as details
     if numbered_lines:
-        formatted += "## Column Details\n"
+        parts.append("## Column Details\n")
         for line in numbered_lines:
             # Format numbered items with bold labels
-            if re.match(r'^\d+\.\s+[A-Z][^:]*:', line):
+            if _NUMBERED_HEADER.match(line):
                 # Extract number, label, and description
-                match = re.match(r'^(\d+)\.\s+([^:]+):\s*(.*)', line)
+                match = _NUMBERED_ITEM.match(line)
                 if match:
                     number = match.group(1)
                     label = match.group(2).strip()
                     description = match.group(3).strip()
-                    formatted += f"{number}. **{label}**: {description}\n"
+                    parts.append(f"{number}. **{label}**: {description}\n")
                 else:
-                    formatted += line + "\n"
+                    parts.append(line + "\n")
             else:
-                formatted += line + "\n"
+                parts.append(line + "\n")
     
-    return formatted.strip()
+    return ''.join(parts).strip()
 
 def format_inline_numbered_list(text: str) -> str:
     """
@@ -235,42 +256,24 @@ def format_inline_numbered_list(text: str) -> str:
     intro = text[:intro_end].strip()
     numbered_part = text[intro_end:].strip()
     
-    # Split the numbered part into individual items
+    # Split the numbered part into individual items in one pass
     # Pattern to match: "1. Label: Description 2. Label: Description"
-    items = re.findall(r'(\d+)\.\s+([^:]+):\s*([^0-9]+?)(?=\d+\.|$)', numbered_part)
-    
-    # If the regex didn't capture all items, try a different approach
-    if len(items) < 5:  # If we didn't get many items, try splitting differently
-        # Split by numbered items more aggressively
-        parts = re.split(r'(\d+\.\s+[^:]+:)', numbered_part)
-        items = []
-        for i in range(1, len(parts), 2):  # Skip the first empty part
-            if i + 1 < len(parts):
-                number_label = parts[i].strip()
-                description = parts[i + 1].strip()
-                
-                # Extract number and label
-                match = re.match(r'(\d+)\.\s+(.+)', number_label)
-                if match:
-                    number = match.group(1)
-                    label = match.group(2).rstrip(':')
-                    items.append((number, label, description))
+    items = [(m.group(1), m.group(2), m.group(3)) for m in _INLINE_ITEM.finditer(numbered_part)]
     
-    formatted = ""
+    parts = []
     
     # Add introduction as overview
     if intro:
-        formatted += "## Overview\n"
-        formatted += intro
-        formatted += "\n\n"
+        parts.append("## Overview\n")
+        parts.append(intro)
+        parts.append("\n\n")
     
     # Add numbered list as details
     if items:
-        formatted += "## Column Details\n"
-        for number, label, description in items:
-            formatted += f"{number}. **{label.strip()}**: {description.strip()}\n"
+        parts.append("## Column Details\n")
+        parts.extend(f"{number}. **{label.strip()}**: {description.strip()}\n" for number, label, description in items)
     
-    return formatted.strip()
+    return ''.join(parts).strip()
 
 def format_sources(sources: List[Dict[str, Any]]) -> str:
     """
@@ -279,15 +282,15 @@ def format_sources(sources: List[Dict[str, Any]]) -> str:
     if not sources:
         return ""
     
-    formatted = "\n\n## Sources\n"
+    parts = ["\n\n## Sources\n"]
     for i, source in enumerate(sources, 1):
         title = source.get('title', 'Unknown')
         url = source.get('url', '')
         space = source.get('space_name', '')
         
         if url:
-            formatted += f"{i}. [{title} ({space})]({url})\n"
+            parts.append(f"{i}. [{title} ({space})]({url})\n")
         else:
-            formatted += f"{i}. {title} ({space})\n"
+            parts.append(f"{i}. {title} ({space})\n")
     
-    return formatted 
\ No newline at end of file
+    return ''.join(parts) 
\ No newline at end of file
@@ -1,43 +1,72 @@
 # src/ingest.py
 
 import os
-import json
 import hashlib
 import argparse
+import logging
+from collections import defaultdict, deque
+import signal
+import threading
+import multiprocessing
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 from datetime import datetime, timedelta
-from src.confluence_client import ConfluenceClient
-from src.ollama_client import get_embedding
-from src.vector_store import create_collection, upsert_embeddings
-import requests
+from src.confluence_client import get_client, extract_pdf_file_text, is_pdf_attachment, parse_json, ATTACHMENT_LOOKUP_BATCH
+from src.ollama_client import get_embeddings
+from src.vector_store import (
+    create_collection, upsert_embeddings, compact_vector, begin_bulk_ingest, finalize_ingest,
+    existing_file_versions, DEFAULT_QUANTIZATION
+)
+from src.qa_cache import invalidate as invalidate_qa_cache
+from src.config_loader import load_spaces_config
+from src.progress_store import get_summary, set_summary, get_page_hash, upsert_page, get_body_hash, get_body_version, get_body_attachments, set_body_hash, flush as flush_progress, compact as compact_progress
+
+# Per-page/per-document lines go to DEBUG; spaces, batches and errors are still printed
+log = logging.getLogger(__name__)
+
+SUMMARY_KEYS = ("last_run", "processed_spaces", "total_documents", "last_updated", "current_progress")
+DEFAULT_WORKERS = 8
+# Page batches between detailed progress reports
+DETAILED_PROGRESS_EVERY = 4
+# Local files read concurrently and embedded per batch request (several batches in flight)
+LOCAL_DOCS_BATCH_SIZE = 64
+LOCAL_READ_WORKERS = 16
+LOCAL_EMBED_CONCURRENCY = 4
+LOCAL_DOC_EXTENSIONS = ('.txt', '.md', '.pdf')
+# Embedded documents are buffered across page batches and upserted in groups of this size
+UPSERT_FLUSH_SIZE = 256
+# ...or once their text adds up to this many bytes
+UPSERT_FLUSH_BYTES = 8 * 1024 * 1024
+# Concurrent child-page requests per tree level (siblings fan out together)
+CHILD_FETCH_WORKERS = 16
+# Spaces listed concurrently before processing starts
+SPACE_LISTING_WORKERS = 4
+# Processes extracting PDF text (CPU-bound, so one per core)
+PDF_WORKERS = os.cpu_count() or 1
+
+def _ignore_sigint():
+    """
+    PDF worker process initializer: leave Ctrl+C to the ingesting process, which stops the
+    pool itself, so a graceful stop doesn't break the pool mid-extraction
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
 
 def load_config():
     """
-    Load spaces configuration from config/spaces.json
+    Load spaces configuration from config/spaces.json (cached until the file changes)
     """
-    config_path = os.path.join("config", "spaces.json")
     try:
-        with open(config_path, "r") as f:
-            config = json.load(f)
-        return config
+        return load_spaces_config(os.path.join("config", "spaces.json"))
     except Exception as e:
         print(f"❌ Error loading config: {e}")
         return []
 
 def load_progress():
     """
-    Load ingestion progress from progress/ingestion_progress.json
+    Load ingestion progress summary from progress/ingestion.db
     """
-    progress_path = os.path.join("progress", "ingestion_progress.json")
-    try:
-        if os.path.exists(progress_path):
-            with open(progress_path, "r") as f:
-                return json.load(f)
-    except Exception as e:
-        print(f"⚠️ Error loading progress: {e}")
-    return {
+    progress_data = {
         "last_run": None,
         "processed_spaces": {},
-        "processed_pages": {},
         "total_documents": 0,
         "last_updated": None,
         "current_progress": {
@@ -50,55 +79,115 @@ def load_progress():
             "percentage_complete": 0.0
         }
     }
+    try:
+        progress_data.update(get_summary(SUMMARY_KEYS))
+    except Exception as e:
+        print(f"⚠️ Error loading progress: {e}")
+    return progress_data
 
-def save_progress(progress_data):
+def save_progress(progress_data, flush=False):
     """
-    Save ingestion progress to progress/ingestion_progress.json
+    Save ingestion progress summary to progress/ingestion.db
+    Writes are committed in batches; flush=True commits everything pending right away
     """
-    os.makedirs("progress", exist_ok=True)
-    progress_path = os.path.join("progress", "ingestion_progress.json")
     try:
-        with open(progress_path, "w") as f:
-            json.dump(progress_data, f, indent=2, default=str)
+        set_summary({key: progress_data.get(key) for key in SUMMARY_KEYS})
+        if flush:
+            flush_progress()
     except Exception as e:
         print(f"⚠️ Error saving progress: {e}")
 
+def finish_progress(progress_data):
+    """
+    Save the final progress summary at the end of a run and compact the progress database
+    """
+    save_progress(progress_data, flush=True)
+    try:
+        compact_progress()
+    except Exception as e:
+        print(f"⚠️ Error compacting progress: {e}")
+
 def get_content_hash(content):
     """
     Generate a hash for content to detect changes
     """
-    return hashlib.md5(content.encode('utf-8')).hexdigest()
+    return get_content_hashes([content])[0]
+
+_CONTENT_HASH_BASE = hashlib.blake2b(digest_size=16)
+
+# Texts longer than this are encoded and hashed piecewise, so no full UTF-8 copy is made
+_HASH_CHUNK_CHARS = 1 << 20
 
-def is_content_updated(page_id, content_hash, progress_data):
+def get_content_hashes(contents):
+    """
+    Hash a batch of contents (same digests as get_content_hash), copying one
+    pre-initialized hash state instead of constructing a new one per item
+    """
+    hashes = []
+    for content in contents:
+        h = _CONTENT_HASH_BASE.copy()
+        if len(content) <= _HASH_CHUNK_CHARS:
+            h.update(content.encode('utf-8'))
+        else:
+            for start in range(0, len(content), _HASH_CHUNK_CHARS):
+                h.update(content[start:start + _HASH_CHUNK_CHARS].encode('utf-8'))
+        hashes.append(h.hexdigest())
+    return hashes
+
+def compute_page_hash(html):
+    """
+    Hash a page's raw storage HTML to detect body changes before any fetching or embedding
+    """
+    return hashlib.blake2b(html.encode('utf-8'), digest_size=16).digest()
+
+def attachment_versions(attachments):
+    """
+    Key of a page's PDF attachments and their version numbers; adding, replacing or removing
+    a PDF changes it (the page body and version don't change with its attachments)
+    """
+    return ",".join(sorted(f"{a.get('id')}:{(a.get('version') or {}).get('number')}" for a in attachments if is_pdf_attachment(a)))
+
+def page_unchanged(page_id, new_hash, attachments_key):
+    """
+    Check whether a page body and its PDF attachments are identical to the ones seen on the
+    last successful ingestion
+    """
+    return get_body_hash(page_id) == new_hash and get_body_attachments(page_id) == attachments_key
+
+def version_unchanged(page_id, version, attachments_key):
+    """
+    Check whether a page still has the Confluence version and PDF attachment versions seen on
+    the last successful ingestion (attachment changes don't bump the page version)
+    """
+    return version is not None and get_body_version(page_id) == version and get_body_attachments(page_id) == attachments_key
+
+def is_content_updated(page_id, content_hash):
     """
     Check if content has been updated since last ingestion
     """
-    if page_id not in progress_data["processed_pages"]:
-        return True  # New page
-    
-    last_hash = progress_data["processed_pages"][page_id].get("content_hash")
-    return last_hash != content_hash
+    return get_page_hash(page_id) != content_hash
 
-def update_progress(progress_data, space_key, page_id, content_hash, metadata):
+def update_progress(progress_data, space_key, page_id, content_hash, metadata, now=None):
     """
-    Update progress tracking data
+    Update progress tracking data (one row upsert per page)
+    `now` lets callers reuse one timestamp for all documents of a page
     """
+    if now is None:
+        now = datetime.now()
+    now_iso = now.isoformat()
+    
     if space_key not in progress_data["processed_spaces"]:
         progress_data["processed_spaces"][space_key] = {
-            "last_processed": datetime.now().isoformat(),
+            "last_processed": now_iso,
             "page_count": 0
         }
     
     progress_data["processed_spaces"][space_key]["page_count"] += 1
-    progress_data["processed_spaces"][space_key]["last_processed"] = datetime.now().isoformat()
+    progress_data["processed_spaces"][space_key]["last_processed"] = now_iso
     
-    progress_data["processed_pages"][page_id] = {
-        "content_hash": content_hash,
-        "last_processed": datetime.now().isoformat(),
-        "metadata": metadata
-    }
+    upsert_page(page_id, content_hash, space_key, metadata, last_processed=int(now.timestamp()))
     
-    progress_data["last_updated"] = datetime.now().isoformat()
+    progress_data["last_updated"] = now_iso
     progress_data["total_documents"] += 1
 
 def update_current_progress(progress_data, space_index, page_index, batch_index, total_spaces, total_pages, total_batches):
@@ -124,16 +213,21 @@ def update_current_progress(progress_data, space_index, page_index, batch_index,
         overall_progress = (space_progress + page_progress) / 2
         progress_data["current_progress"]["percentage_complete"] = round(overall_progress * 100, 2)
 
-def print_progress_bar(current, total, prefix="Progress", suffix="Complete", length=50):
+def format_progress_bar(current, total, prefix="Progress", suffix="Complete", length=50):
     """
-    Print a progress bar
+    Render a progress bar line
     """
     filled_length = int(length * current // total)
     bar = '█' * filled_length + '-' * (length - filled_length)
     percentage = current / total * 100
-    print(f'\r{prefix}: |{bar}| {percentage:.1f}% {suffix}', end='', flush=True)
-    if current == total:
-        print()  # New line when complete
+    return f'{prefix}: |{bar}| {percentage:.1f}% {suffix}'
+
+def print_progress_bar(current, total, prefix="Progress", suffix="Complete", length=50):
+    """
+    Print a progress bar
+    """
+    # New line when complete
+    print(f'\r{format_progress_bar(current, total, prefix, suffix, length)}', end='\n' if current == total else '', flush=True)
 
 def print_detailed_progress(progress_data, current_space, current_page, total_spaces, total_pages, total_processed, total_updated, total_skipped):
     """
@@ -142,15 +236,22 @@ def print_detailed_progress(progress_data, current_space, current_page, total_sp
     current_progress = progress_data.get("current_progress", {})
     percentage = current_progress.get("percentage_complete", 0.0)
     
-    print(f"\n📊 Progress: {percentage:.1f}% Complete")
-    print(f"   🌐 Space: {current_space} ({current_progress.get('current_space_index', 0) + 1}/{total_spaces})")
-    print(f"   📄 Page: {current_page} ({current_progress.get('current_page_index', 0) + 1}/{total_pages})")
-    print(f"   📝 Processed: {total_processed} | Updated: {total_updated} | Skipped: {total_skipped}")
+    lines = [
+        f"\n📊 Progress: {percentage:.1f}% Complete",
+        f"   🌐 Space: {current_space} ({current_progress.get('current_space_index', 0) + 1}/{total_spaces})",
+        f"   📄 Page: {current_page} ({current_progress.get('current_page_index', 0) + 1}/{total_pages})",
+        f"   📝 Processed: {total_processed} | Updated: {total_updated} | Skipped: {total_skipped}"
+    ]
     
-    # Print progress bar
+    # Progress bar (left without a newline until complete)
+    end = '\n'
     if total_pages > 0:
         current_page_index = current_progress.get('current_page_index', 0)
-        print_progress_bar(current_page_index, total_pages, "Page Progress", "Complete")
+        lines.append(format_progress_bar(current_page_index, total_pages, "Page Progress", "Complete"))
+        end = '\n' if current_page_index == total_pages else ''
+    
+    # One write per report instead of one per line
+    print("\n".join(lines), end=end, flush=True)
 
 def get_resume_point(progress_data, all_spaces_to_process):
     """
@@ -171,34 +272,74 @@ def get_resume_point(progress_data, all_spaces_to_process):
     
     return space_index, page_index, batch_index
 
+# Per-run traversal caches (cleared by clear_traversal_caches at the start of each ingestion)
+_child_spaces_cache = {}
+_child_pages_cache = {}
+
+def clear_traversal_caches():
+    """
+    Forget nested spaces and child pages seen by a previous run
+    """
+    _child_spaces_cache.clear()
+    _child_pages_cache.clear()
+
+def _space_description(space):
+    """
+    Get a space's plain-text description, or "" when the space has none
+    """
+    try:
+        return space["description"]["plain"]["value"]
+    except (KeyError, TypeError):
+        return ""
+
+def _get_child_spaces(client, space_key):
+    """
+    Get the direct child spaces of a space, memoized per run
+    """
+    child_spaces = _child_spaces_cache.get(space_key)
+    if child_spaces is None:
+        child_spaces = _child_spaces_cache[space_key] = client.get_child_spaces(space_key)
+    return child_spaces
+
 def get_all_nested_spaces(client, parent_space_key, max_depth=3, current_depth=0):
     """
-    Recursively get all nested spaces from a parent space
+    Get all nested spaces from a parent space, depth first (iterative, no recursion)
+    Each space is listed once even when reachable from several parents
     """
     if current_depth >= max_depth:
         return []
     
     try:
-        # Get direct child spaces
-        child_spaces = client.get_child_spaces(parent_space_key)
-        
         all_spaces = []
-        for child_space in child_spaces:
-            space_info = {
-                "key": child_space.get("key"),
+        visited = {parent_space_key}
+        # Stack of (remaining child spaces, their parent key, their depth)
+        stack = [(iter(_get_child_spaces(client, parent_space_key)), parent_space_key, current_depth + 1)]
+        while stack:
+            child_spaces, parent_key, depth = stack[-1]
+            child_space = next(child_spaces, None)
+            if child_space is None:
+                stack.pop()
+                continue
+            
+            space_key = child_space.get("key")
+            if space_key in visited:
+                continue
+            visited.add(space_key)
+            
+            all_spaces.append({
+                "key": space_key,
                 "name": child_space.get("name"),
                 "type": child_space.get("type"),
-                "parent_key": parent_space_key,
-                "depth": current_depth + 1,
-                "url": f"{client.base_url}/display/{child_space.get('key')}",
-                "description": child_space.get("description", {}).get("plain", {}).get("value", ""),
+                "parent_key": parent_key,
+                "depth": depth,
+                "url": f"{client.base_url}/display/{space_key}",
+                "description": _space_description(child_space),
                 "status": child_space.get("status", "unknown")
-            }
-            all_spaces.append(space_info)
+            })
             
-            # Recursively get nested spaces
-            nested_spaces = get_all_nested_spaces(client, child_space.get("key"), max_depth, current_depth + 1)
-            all_spaces.extend(nested_spaces)
+            # Descend into this space's own children next
+            if depth < max_depth:
+                stack.append((iter(_get_child_spaces(client, space_key)), space_key, depth + 1))
         
         return all_spaces
     except Exception as e:
@@ -219,7 +360,12 @@ def get_space_pages(client, space_key, limit=None):
 def get_child_pages(client, page_id):
     """
     Get all child pages of a parent page
+    Memoized per run; callers get fresh dicts since pages are filled in later (load_page_body)
     """
+    cached = _child_pages_cache.get(page_id)
+    if cached is not None:
+        return [dict(page) for page in cached]
+    
     try:
         url = f"{client.base_url}/rest/api/content/{page_id}/child/page"
         params = {
@@ -227,59 +373,224 @@ def get_child_pages(client, page_id):
             "expand": "version,space"
         }
         
-        response = requests.get(url, headers=client.headers)
+        response = client.session.get(url, params=params)
         response.raise_for_status()
         
-        data = response.json()
-        return data.get("results", [])
+        data = parse_json(response)
+        child_pages = data.get("results", [])
+        _child_pages_cache[page_id] = child_pages
+        return [dict(page) for page in child_pages]
         
     except Exception as e:
         print(f"Error getting child pages for {page_id}: {e}")
         return []
 
-def get_all_pages_recursive(client, space_key, limit=None):
+def get_all_pages_recursive(client, space_key, limit=None, workers=CHILD_FETCH_WORKERS):
     """
     Get all pages from a space including nested child pages recursively
+    
+    One paginated CQL search returns every page with its ancestors, and the page tree is
+    rebuilt locally; the result keeps the depth-first order the resume index relies on.
+    Falls back to walking child pages level by level if the search fails.
+    """
+    print(f"      🔍 Getting pages for space {space_key}...")
+    try:
+        pages = client.search_all_pages_cql(space_key)
+    except Exception as e:
+        print(f"      ⚠️ CQL page search failed for {space_key} ({e}), walking child pages instead")
+        return _walk_child_pages(client, space_key, limit=limit, workers=workers)
+    
+    # Each page hangs under its direct parent (last ancestor); pages without a parent in the space are roots
+    pages_by_id = {page.get('id'): page for page in pages}
+    top_level_pages = []
+    children_by_parent = defaultdict(list)
+    for page in pages_by_id.values():
+        ancestors = page.get('ancestors') or []
+        parent_page = pages_by_id.get(ancestors[-1].get('id')) if ancestors else None
+        if parent_page is None:
+            top_level_pages.append(page)
+        else:
+            children_by_parent[id(parent_page)].append(page)
+    print(f"      📄 Found {len(pages_by_id)} pages ({len(top_level_pages)} top-level)")
+    
+    return _flatten_page_tree(top_level_pages, children_by_parent)
+
+def _walk_child_pages(client, space_key, limit=None, workers=CHILD_FETCH_WORKERS):
     """
-    all_pages = []
+    Get all pages from a space by listing it and requesting child pages per parent
     
+    Child pages are requested for a whole tree level at once on `workers` threads.
+    """
     # Get top-level pages
     print(f"      🔍 Getting top-level pages for space {space_key}...")
     top_level_pages = client.get_all_pages(space_key=space_key, limit=limit)
     print(f"      📄 Found {len(top_level_pages)} top-level pages")
-    all_pages.extend(top_level_pages)
     
-    def get_children_recursive(parent_pages, level=1):
-        if level > 3:  # Limit recursion depth
-            return
-        
-        for parent_page in parent_pages:
-            try:
-                print(f"      🔍 Getting child pages for: {parent_page.get('title', 'Unknown')} (Level {level})")
-                child_pages = get_child_pages(client, parent_page.get('id'))
-                
-                if child_pages:
-                    print(f"      📄 Found {len(child_pages)} child pages for: {parent_page.get('title', 'Unknown')}")
-                    all_pages.extend(child_pages)
-                    get_children_recursive(child_pages, level + 1)
-                else:
-                    print(f"      📄 No child pages for: {parent_page.get('title', 'Unknown')}")
-                    
-            except Exception as e:
-                print(f"      ❌ Error getting child pages for {parent_page.get('title', 'Unknown')}: {e}")
-                continue
+    # Fetch children level by level (at most 3 levels deep); a page already seen (e.g. the
+    # space listing also returns nested pages) is neither repeated nor asked for its children again
+    children_by_parent = {}
+    seen_ids = {page.get('id') for page in top_level_pages}
+    level_pages = top_level_pages
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="cf-children") as pool:
+        for level in range(1, 4):
+            if not level_pages:
+                break
+            
+            next_level_pages = []
+            level_children = pool.map(lambda page: get_child_pages(client, page.get('id')), level_pages)
+            for parent_page, child_pages in zip(level_pages, level_children):
+                child_pages = [page for page in child_pages if page.get('id') not in seen_ids]
+                seen_ids.update(page.get('id') for page in child_pages)
+                log.debug("🔍 Child pages for: %s (Level %d): %d", parent_page.get('title', 'Unknown'), level, len(child_pages))
+                children_by_parent[id(parent_page)] = child_pages
+                next_level_pages.extend(child_pages)
+            level_pages = next_level_pages
     
-    # Get nested pages recursively
-    get_children_recursive(top_level_pages)
+    return _flatten_page_tree(top_level_pages, children_by_parent)
+
+def _flatten_page_tree(top_level_pages, children_by_parent):
+    """
+    Flatten a page tree: top-level pages, then each parent's children followed by their
+    descendants (iterative walk over a stack of sibling iterators, no recursion).
+    `children_by_parent` maps id(parent page dict) to its child pages.
+    """
+    all_pages = list(top_level_pages)
+    stack = [iter(top_level_pages)]
+    while stack:
+        parent_page = next(stack[-1], None)
+        if parent_page is None:
+            stack.pop()
+            continue
+        child_pages = children_by_parent.get(id(parent_page))
+        if child_pages:
+            all_pages.extend(child_pages)
+            stack.append(iter(child_pages))
     
     return all_pages
 
-def ingest_from_config(incremental=False, daily=False, force=False, resume=True):
+def _bounded_map(executor, fn, items, max_pending, stop_event=None):
+    """
+    Ordered executor.map that keeps at most max_pending tasks queued.
+    Pulling from `items` blocks while the queue is full (backpressure), so chained
+    stages never run ahead of the slowest one.
+    """
+    pending = deque()
+    for item in items:
+        if stop_event is not None and stop_event.is_set():
+            break
+        pending.append(executor.submit(fn, item))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def _batched_attachment_lookup(client, page_ids):
+    """
+    Build a thread-safe page id -> attachments lookup. The first lookup for a page fetches
+    the attachments of its whole batch of ATTACHMENT_LOOKUP_BATCH pages in one request.
+    Returns None for a page when the bulk search failed (fetch that page's attachments directly).
+    """
+    batch_index = {page_id: i // ATTACHMENT_LOOKUP_BATCH for i, page_id in enumerate(page_ids)}
+    batches = {}
+    lock = threading.Lock()
+    
+    def lookup(page_id):
+        index = batch_index.get(page_id)
+        if index is None:
+            return None
+        
+        with lock:
+            future = batches.get(index)
+            is_owner = future is None
+            if is_owner:
+                future = batches[index] = Future()
+        
+        if is_owner:
+            batch_ids = page_ids[index * ATTACHMENT_LOOKUP_BATCH:(index + 1) * ATTACHMENT_LOOKUP_BATCH]
+            future.set_result(client.get_attachments_for_pages(batch_ids) or {})
+        return future.result().get(page_id)
+    
+    return lookup
+
+def _fetch_page_documents(client, page, incremental, attachment_lookup=None, duplicate=False):
+    """
+    Fetch a page with its PDF attachments and keep only the documents that need embedding (fetch worker)
+    A `duplicate` page (already taken earlier in the run) is skipped without any request
+    """
+    result = {"page": page, "page_hash": None, "version": None, "attachments": None, "documents": None, "skipped": [], "vectors": [],
+              "failed_attachments": [], "error": None, "duplicate": duplicate}
+    try:
+        if duplicate:
+            return result
+        
+        attachments = attachment_lookup(page.get("id")) if attachment_lookup else None
+        if attachments is None:
+            attachments = client.get_page_attachments(page.get("id"))
+        result["attachments"] = attachment_versions(attachments)
+        
+        # Same version and PDFs as last time: skip without even fetching the body
+        version = (page.get("version") or {}).get("number")
+        result["version"] = version
+        if incremental and version_unchanged(page.get("id"), version, result["attachments"]):
+            return result
+        
+        # Listings come without bodies, so fetch this page's body first
+        client.load_page_body(page)
+        
+        # Skip the whole page (parse, downloads, embedding) when its body and PDFs are unchanged
+        result["page_hash"] = compute_page_hash(page.get("body", {}).get("storage", {}).get("value", ""))
+        if incremental and page_unchanged(page.get("id"), result["page_hash"], result["attachments"]):
+            return result
+        
+        result["documents"] = []
+        docs = client.get_page_with_attachments(page, attachments=attachments, failed_attachments=result["failed_attachments"])
+        for doc, content_hash in zip(docs, get_content_hashes(doc["text"] for doc in docs)):
+            doc_id = f"{page.get('id')}_{doc.get('type', 'page')}"
+            
+            # Check if content needs updating (incremental mode)
+            if incremental and not is_content_updated(doc_id, content_hash):
+                result["skipped"].append(doc["title"])
+                continue
+            
+            result["documents"].append((doc, doc_id, content_hash))
+    except Exception as e:
+        result["error"] = e
+    finally:
+        # The documents carry the extracted text; drop the HTML so a space's page list doesn't keep every body alive
+        page.pop("body", None)
+    return result
+
+def _embed_page_documents(result):
+    """
+    Get embeddings for every document fetched for a page in one batch request (embed worker)
+    Texts embedded before (templated pages, PDFs attached in several places) come from the
+    on-disk embedding cache (see get_embeddings)
+    """
+    documents = result["documents"]
+    if not documents:
+        return result
+    
+    result["vectors"] = get_embeddings([doc["text"] for doc, _, _ in documents])
+    return result
+
+def ingest_from_config(incremental=False, daily=False, force=False, resume=True, workers=DEFAULT_WORKERS, stop_event=None, wait=True,
+                       quantization=DEFAULT_QUANTIZATION):
     """
     Ingest documents from configured spaces including all nested spaces and PDF attachments
     Supports incremental updates and progress tracking with resume capability
+    
+    Pages are fetched on a pool of `workers` threads and embedded on a smaller pool, with at
+    most 2*workers pages in flight per stage; PDF text is extracted on PDF_WORKERS processes
+    and upserts run on a background thread.
+    Setting `stop_event` halts after the current page.
+    Embedded documents are upserted in groups of UPSERT_FLUSH_SIZE (or UPSERT_FLUSH_BYTES of
+    text, if that is reached first); with wait=False upserts
+    return before Qdrant has finished indexing the points.
+    `quantization` only applies when the collection has to be created.
     """
     try:
+        clear_traversal_caches()
+        
         print("📋 Loading configuration...")
         config_spaces = load_config()
         
@@ -308,12 +619,12 @@ def ingest_from_config(incremental=False, daily=False, force=False, resume=True)
                 return
         
         print(f"🔗 Connecting to Confluence...")
-        client = ConfluenceClient()
+        client = get_client()
         
         print(f"📚 Found {len(config_spaces)} configured spaces")
         
         # Create collection if it doesn't exist
-        create_collection()
+        create_collection(quantization=quantization)
         
         all_spaces_to_process = []
         processed_spaces = []  # Track processed spaces for verification
@@ -366,160 +677,291 @@ def ingest_from_config(incremental=False, daily=False, force=False, resume=True)
         page_limit = None  # No limit - get ALL pages
         
         # Calculate total pages for progress tracking
-        total_pages = 0
-        for space in all_spaces_to_process:
+        # (the page lists are kept and reused by the processing pass below)
+        child_workers = max(workers, CHILD_FETCH_WORKERS)
+        # Spaces are listed SPACE_LISTING_WORKERS at a time; the requests are network-bound
+        pages_by_space = {}
+        with ThreadPoolExecutor(max_workers=SPACE_LISTING_WORKERS, thread_name_prefix="cf-spaces") as listing_pool:
+            futures = {
+                listing_pool.submit(get_all_pages_recursive, client, space["key"], limit=page_limit, workers=child_workers): space
+                for space in all_spaces_to_process
+            }
+            for future in as_completed(futures):
+                space = futures[future]
+                try:
+                    pages_by_space[space["key"]] = future.result()
+                except Exception as e:
+                    print(f"  ⚠️ Could not count pages for {space['name']}: {e}")
+        total_pages = sum(len(pages) for pages in pages_by_space.values())
+        
+        print(f"📄 Total pages to process: {total_pages}")
+        
+        fetch_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="cf-fetch")
+        embed_pool = ThreadPoolExecutor(max_workers=max(1, workers // 2), thread_name_prefix="cf-embed")
+        # Fetch threads download PDFs and hand the text extraction to worker processes (no GIL contention)
+        pdf_pool = ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=multiprocessing.get_context("spawn"),
+                                       initializer=_ignore_sigint)
+        client.pdf_executor = pdf_pool
+        
+        # Upserts run on their own thread (one in flight) so Qdrant writes overlap fetching and embedding
+        upsert_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="qdrant-upsert")
+        upsert_in_flight = None  # (future, document count, progress records, resume point)
+        # Resume point (current_progress) up to which every page's documents are stored; the live
+        # current_progress runs ahead of it while documents wait in pending_docs or in flight.
+        # It stops advancing after a failed upsert, so a resume goes back to the failed pages.
+        committed_progress = dict(progress_data.get("current_progress") or {})
+        upsert_failed = False
+        
+        # Page IDs already queued in this run; a page listed again (under another space) is skipped
+        seen_page_ids = set()
+        
+        # Documents embedded but not yet upserted, flushed every UPSERT_FLUSH_SIZE documents or
+        # UPSERT_FLUSH_BYTES of text (whichever comes first) and at the end
+        pending_docs = []
+        pending_bytes = 0
+        # Progress records (function, args) of the pending documents' pages, written only once
+        # their upsert succeeded so a failed upsert is retried by the next incremental run
+        pending_records = []
+        
+        def apply_records(records):
+            for record, args in records:
+                record(*args)
+        
+        def save_committed_progress(flush=False):
+            save_progress({**progress_data, "current_progress": committed_progress}, flush=flush)
+        
+        def wait_for_upsert():
+            nonlocal upsert_in_flight, committed_progress, upsert_failed
+            if upsert_in_flight is None:
+                return
+            future, doc_count, records, resume_point = upsert_in_flight
             try:
-                pages = get_all_pages_recursive(client, space["key"], limit=page_limit)
-                total_pages += len(pages)
+                future.result()
+                apply_records(records)
+                # Save progress after each upsert (committed to disk in larger groups)
+                if not upsert_failed:
+                    committed_progress = resume_point
+                save_committed_progress()
             except Exception as e:
-                print(f"  ⚠️ Could not count pages for {space['name']}: {e}")
+                upsert_failed = True
+                print(f"        ❌ Error upserting {doc_count} documents: {e}")
+                # Continue with next batch instead of failing completely
+            upsert_in_flight = None
         
-        print(f"📄 Total pages to process: {total_pages}")
+        def flush_pending():
+            nonlocal upsert_in_flight, pending_bytes, committed_progress
+            # Every page consumed so far has its documents in this flush or an earlier one
+            resume_point = dict(progress_data.get("current_progress") or {})
+            if not pending_docs:
+                # Pages without new documents have nothing to wait for
+                apply_records(pending_records)
+                pending_records.clear()
+                if upsert_in_flight is None:
+                    if not upsert_failed:
+                        committed_progress = resume_point
+                else:
+                    # ...but they come after the in-flight upsert's pages
+                    upsert_in_flight = upsert_in_flight[:3] + (resume_point,)
+                return
+            wait_for_upsert()
+            upsert_in_flight = (upsert_pool.submit(upsert_embeddings, list(pending_docs), wait=wait),
+                                len(pending_docs), list(pending_records), resume_point)
+            pending_docs.clear()
+            pending_records.clear()
+            pending_bytes = 0
         
-        for i in range(start_space_index, len(all_spaces_to_process), space_batch_size):
-            space_batch = all_spaces_to_process[i:i + space_batch_size]
-            batch_num = i//space_batch_size + 1
-            total_batches = (len(all_spaces_to_process) + space_batch_size - 1)//space_batch_size
-            
-            print(f"\n🔄 Processing space batch {batch_num}/{total_batches}")
-            
-            for space_idx, space in enumerate(space_batch):
-                try:
-                    current_space_name = space['name']
-                    print(f"  📄 Processing space: {current_space_name} ({space['key']}) - Depth: {space['depth']}")
-                    
-                    # Get pages from this space with limit (now including nested pages)
-                    pages = get_all_pages_recursive(client, space["key"], limit=page_limit)
-                    
-                    if not pages:
-                        print(f"    ⚠️ No pages found in {space['name']} ({space['key']})")
-                        continue
-                    
-                    print(f"    📄 Found {len(pages)} pages in {space['name']} (including nested pages)")
-                    
-                    # Track this space as processed
-                    processed_spaces.append({
-                        "name": space["name"],
-                        "key": space["key"],
-                        "depth": space["depth"],
-                        "page_count": len(pages)
-                    })
+        # HNSW indexing is deferred until every point of this run is in
+        begin_bulk_ingest()
+        try:
+            for i in range(start_space_index, len(all_spaces_to_process), space_batch_size):
+                if stop_event is not None and stop_event.is_set():
+                    break
+                
+                space_batch = all_spaces_to_process[i:i + space_batch_size]
+                batch_num = i//space_batch_size + 1
+                total_batches = (len(all_spaces_to_process) + space_batch_size - 1)//space_batch_size
+                
+                print(f"\n🔄 Processing space batch {batch_num}/{total_batches}")
+                
+                for space_idx, space in enumerate(space_batch):
+                    if stop_event is not None and stop_event.is_set():
+                        break
                     
-                    # Process pages in smaller batches
-                    page_batch_size = 5
-                    for j in range(start_page_index if space_idx == 0 and i == start_space_index else 0, len(pages), page_batch_size):
-                        page_batch = pages[j:j + page_batch_size]
-                        batch_num = j//page_batch_size + 1
+                    try:
+                        current_space_name = space['name']
+                        print(f"  📄 Processing space: {current_space_name} ({space['key']}) - Depth: {space['depth']}")
+                        
+                        # Get pages from this space (listed by the counting pass, including nested pages)
+                        pages = pages_by_space.pop(space["key"], None)
+                        if pages is None:
+                            pages = get_all_pages_recursive(client, space["key"], limit=page_limit, workers=child_workers)
+                        
+                        if not pages:
+                            print(f"    ⚠️ No pages found in {space['name']} ({space['key']})")
+                            continue
+                        
+                        print(f"    📄 Found {len(pages)} pages in {space['name']} (including nested pages)")
+                        
+                        # Track this space as processed
+                        processed_spaces.append({
+                            "name": space["name"],
+                            "key": space["key"],
+                            "depth": space["depth"],
+                            "page_count": len(pages)
+                        })
+                        
+                        # Fetch and embed pages on the worker pools; results come back in page order
+                        page_batch_size = 5
                         total_page_batches = (len(pages) + page_batch_size - 1)//page_batch_size
+                        last_page_index = len(pages) - 1
+                        first_page_index = start_page_index if space_idx == 0 and i == start_space_index else 0
                         
-                        print(f"      🔄 Processing page batch {batch_num}/{total_page_batches} for {space['name']}")
+                        pages_to_fetch = pages[first_page_index:]
+                        duplicate_pages = set()
+                        for page in pages_to_fetch:
+                            if page.get("id") in seen_page_ids:
+                                duplicate_pages.add(id(page))
+                            else:
+                                seen_page_ids.add(page.get("id"))
+                        attachment_lookup = _batched_attachment_lookup(
+                            client, [page.get("id") for page in pages_to_fetch if id(page) not in duplicate_pages])
+                        fetched = _bounded_map(fetch_pool, lambda page: _fetch_page_documents(client, page, incremental, attachment_lookup,
+                                                                                              duplicate=id(page) in duplicate_pages),
+                                               pages_to_fetch, 2 * workers, stop_event)
+                        embedded = _bounded_map(embed_pool, _embed_page_documents, fetched, 2 * workers)
                         
-                        docs_with_embeddings = []
+                        batch_doc_count = 0
                         
-                        # Process each page (including PDF attachments)
-                        for page_idx, page in enumerate(page_batch):
-                            try:
-                                page_id = page.get('id', 'Unknown')
-                                page_title = page.get('title', 'Unknown')
-                                
-                                # Update progress tracking
-                                current_page_index = j + page_idx
-                                update_current_progress(progress_data, i, current_page_index, batch_num, 
-                                                      len(all_spaces_to_process), total_pages, total_batches)
-                                
-                                print(f"        📄 Processing page: {page_title} (ID: {page_id})")
-                                
-                                # Get page content and PDF attachments
-                                documents = client.get_page_with_attachments(page)
+                        # Metadata shared by every document of this space
+                        space_metadata = {
+                            "space_key": space["key"],
+                            "space_name": space["name"],
+                            "space_depth": space["depth"],
+                            "parent_space": space.get("parent_key")
+                        }
+                        # Start of every document's text_prefix in this space
+                        space_title_prefix = f"Space: {space['name']}\nTitle: "
+                        
+                        for page_offset, result in enumerate(embedded):
+                            page = result["page"]
+                            page_id = page.get('id', 'Unknown')
+                            page_title = page.get('title', 'Unknown')
+                            now = datetime.now()
+                            last_updated = now.isoformat()
+                            
+                            # Update progress tracking
+                            current_page_index = first_page_index + page_offset
+                            batch_num = current_page_index//page_batch_size + 1
+                            update_current_progress(progress_data, i, current_page_index, batch_num, 
+                                                  len(all_spaces_to_process), total_pages, total_batches)
+                            
+                            log.debug("📄 Processing page: %s (ID: %s)", page_title, page_id)
+                            
+                            if result["error"]:
+                                print(f"        ❌ Error processing page {page_title} in {space['name']}: {result['error']}")
+                            elif result["documents"] is None:
+                                log.debug("⏭️ Skipping %s page: %s", "duplicate" if result["duplicate"] else "unchanged", page_title)
+                                total_skipped += 1
+                            else:
+                                for title in result["skipped"]:
+                                    log.debug("⏭️ Skipping unchanged: %s", title)
+                                total_skipped += len(result["skipped"])
+                                # A PDF that failed to download or extract is retried by the next run
+                                page_complete = not result["failed_attachments"]
                                 
-                                for doc in documents:
-                                    doc_id = f"{page_id}_{doc.get('type', 'page')}"
-                                    content_hash = get_content_hash(doc["text"])
-                                    
-                                    # Check if content needs updating (incremental mode)
-                                    if incremental and not is_content_updated(doc_id, content_hash, progress_data):
-                                        print(f"          ⏭️ Skipping unchanged: {doc['title']}")
-                                        total_skipped += 1
-                                        continue
-                                    
-                                    print(f"          📝 Processing document: {doc['title']} (Type: {doc.get('type', 'page')})")
+                                for (doc, doc_id, content_hash), vector in zip(result["documents"], result["vectors"]):
+                                    content_type = doc.get("type", "page")
+                                    log.debug("📝 Processing document: %s (Type: %s)", doc['title'], content_type)
                                     
-                                    # Get embedding for the document content
-                                    vector = get_embedding(doc["text"])
                                     if vector:
                                         # Prepare metadata
                                         metadata = {
                                             "page_id": doc["id"],
                                             "page_title": doc["title"],
-                                            "space_key": space["key"],
-                                            "space_name": space["name"],
-                                            "space_depth": space["depth"],
-                                            "parent_space": space.get("parent_key"),
+                                            **space_metadata,
                                             "url": doc["url"],
                                             "version": doc["version"],
-                                            "content_type": doc.get("type", "page"),
-                                            "last_updated": datetime.now().isoformat()
+                                            "content_type": content_type,
+                                            "last_updated": last_updated,
+                                            # Prepended at query time (payload_text) instead of copying every body
+                                            "text_prefix": space_title_prefix + doc["title"]
                                         }
                                         
                                         # Add PDF-specific metadata
-                                        if doc.get("type") == "pdf_attachment":
+                                        if content_type == "pdf_attachment":
                                             metadata.update({
                                                 "attachment_id": doc.get("attachment_id"),
                                                 "attachment_title": doc.get("attachment_title")
                                             })
-                                            print(f"            📎 PDF attachment: {doc.get('attachment_title')}")
+                                            log.debug("📎 PDF attachment: %s", doc.get('attachment_title'))
                                         
-                                        docs_with_embeddings.append({
-                                            "text": f"Space: {space['name']}\nTitle: {doc['title']}\n\n{doc['text']}",
-                                            "vector": vector,
+                                        pending_docs.append({
+                                            "text": doc["text"],
+                                            "vector": compact_vector(vector),
                                             "metadata": metadata
                                         })
+                                        pending_bytes += len(doc["text"])
+                                        batch_doc_count += 1
                                         
-                                        # Update progress tracking
-                                        update_progress(progress_data, space["key"], doc_id, content_hash, metadata)
+                                        # Update progress tracking (once the upsert succeeded)
+                                        pending_records.append((update_progress, (progress_data, space["key"], doc_id, content_hash, metadata, now)))
                                         
                                         total_processed += 1
                                         if incremental:
                                             total_updated += 1
-                                            print(f"            ✅ Updated: {doc['title']}")
+                                            log.debug("✅ Updated: %s", doc['title'])
                                         else:
-                                            print(f"            ✅ Added to batch: {doc['title']}")
+                                            log.debug("✅ Added to batch: %s", doc['title'])
                                     else:
+                                        page_complete = False
                                         print(f"            ⚠️ Failed to get embedding for: {doc['title']} in {space['name']}")
-                                        
-                            except Exception as e:
-                                print(f"        ❌ Error processing page {page.get('title', 'Unknown')} in {space['name']}: {e}")
-                                continue
-                        
-                        # Upsert the page batch
-                        if docs_with_embeddings:
-                            try:
-                                upsert_embeddings(docs_with_embeddings)
-                                print(f"        ✅ Processed {len(docs_with_embeddings)} documents in this page batch for {space['name']}")
-                                
-                                # Print detailed progress
-                                print_detailed_progress(progress_data, current_space_name, page_title, 
-                                                      len(all_spaces_to_process), total_pages, 
-                                                      total_processed, total_updated, total_skipped)
                                 
-                                # Save progress after each batch
-                                save_progress(progress_data)
+                                # Only remember the body hash once every document of the page made it in
+                                if page_complete:
+                                    pending_records.append((set_body_hash, (page_id, result["page_hash"], result["version"], result["attachments"])))
+                            
+                            # Report every page batch (and whatever is left after the last page)
+                            is_last_page = current_page_index == last_page_index
+                            if batch_doc_count and ((current_page_index + 1) % page_batch_size == 0 or is_last_page):
+                                print(f"        ✅ Processed {batch_doc_count} documents in page batch {batch_num}/{total_page_batches} for {space['name']}")
                                 
-                            except Exception as e:
-                                print(f"        ❌ Error upserting batch for {space['name']}: {e}")
-                                # Continue with next batch instead of failing completely
-                                continue
-                    
-                    # Reset page index for next space
-                    start_page_index = 0
-                    
-                except Exception as e:
-                    print(f"  ❌ Error processing space {space['name']} ({space['key']}): {e}")
-                    continue
+                                # Print detailed progress (every few batches and at the end of the space)
+                                if batch_num % DETAILED_PROGRESS_EVERY == 0 or is_last_page:
+                                    print_detailed_progress(progress_data, current_space_name, page_title, 
+                                                          len(all_spaces_to_process), total_pages, 
+                                                          total_processed, total_updated, total_skipped)
+                                batch_doc_count = 0
+                            
+                            # Hand documents to the upsert thread as soon as the buffer is full, even mid-batch
+                            if len(pending_docs) >= UPSERT_FLUSH_SIZE or pending_bytes >= UPSERT_FLUSH_BYTES:
+                                flush_pending()
+                        
+                        # Reset page index for next space
+                        start_page_index = 0
+                        
+                    except Exception as e:
+                        print(f"  ❌ Error processing space {space['name']} ({space['key']}): {e}")
+                        continue
+        finally:
+            flush_pending()
+            wait_for_upsert()
+            upsert_pool.shutdown(wait=True)
+            finalize_ingest()
+            # Cached chat answers may cite replaced content now
+            invalidate_qa_cache()
+            fetch_pool.shutdown(wait=True, cancel_futures=True)
+            embed_pool.shutdown(wait=True, cancel_futures=True)
+            client.pdf_executor = None
+            pdf_pool.shutdown(wait=True, cancel_futures=True)
+        
+        if stop_event is not None and stop_event.is_set():
+            save_committed_progress(flush=True)
+            print("🛑 Stop requested - ingestion halted, progress saved for resume")
+            return processed_spaces
         
         # Save final progress data
         progress_data["last_run"] = datetime.now().isoformat()
-        save_progress(progress_data)
+        finish_progress(progress_data)
         
         # Print final summary
         if incremental:
@@ -551,7 +993,7 @@ def ingest_from_confluence(space_key: str = None):
     """
     try:
         print("🔗 Connecting to Confluence...")
-        client = ConfluenceClient()
+        client = get_client()
         
         print("📄 Fetching pages from Confluence...")
         pages = client.get_pages_for_ingestion(space_key=space_key)
@@ -565,7 +1007,7 @@ def ingest_from_confluence(space_key: str = None):
         # Create collection if it doesn't exist
         create_collection()
         
-        # Process pages in batches
+        # Process pages in batches (get_pages_for_ingestion already loaded their text)
         batch_size = 5
         total_processed = 0
         
@@ -575,38 +1017,28 @@ def ingest_from_confluence(space_key: str = None):
             
             docs_with_embeddings = []
             
-            for page in batch:
-                try:
-                    print(f"  📄 Processing page: {page.get('title', 'Unknown')}")
-                    
-                    # Get page content
-                    content = client.get_page_content(page.get('id'))
-                    if not content:
-                        print(f"    ⚠️ No content found for page: {page.get('title', 'Unknown')}")
-                        continue
-                    
-                    # Get embedding for the page content
-                    vector = get_embedding(content)
-                    if vector:
-                        docs_with_embeddings.append({
-                            "text": content,
-                            "vector": vector,
-                            "metadata": {
-                                "page_id": page.get('id'),
-                                "page_title": page.get('title'),
-                                "space_key": page.get('space', {}).get('key'),
-                                "url": page.get('_links', {}).get('webui', ''),
-                                "version": page.get('version', {}).get('number', 1)
-                            }
-                        })
-                        total_processed += 1
-                        print(f"    ✅ Added to batch: {page.get('title', 'Unknown')}")
-                    else:
-                        print(f"    ⚠️ Failed to get embedding for: {page.get('title', 'Unknown')}")
-                        
-                except Exception as e:
-                    print(f"    ❌ Error processing page {page.get('title', 'Unknown')}: {e}")
-                    continue
+            # Get embeddings for the whole batch at once
+            vectors = get_embeddings([page["text"] for page in batch])
+            for page, vector in zip(batch, vectors):
+                print(f"  📄 Processing page: {page.get('title', 'Unknown')}")
+                if vector:
+                    docs_with_embeddings.append({
+                        "text": page["text"],
+                        "vector": vector,
+                        "metadata": {
+                            "page_id": page.get('id'),
+                            "page_title": page.get('title'),
+                            "space_key": page.get('space_key'),
+                            "url": page.get('url', ''),
+                            "version": page.get('version', 1),
+                            # Same identifying fields as ingest_from_config, so both give a page the same point ID
+                            "content_type": "page"
+                        }
+                    })
+                    total_processed += 1
+                    print(f"    ✅ Added to batch: {page.get('title', 'Unknown')}")
+                else:
+                    print(f"    ⚠️ Failed to get embedding for: {page.get('title', 'Unknown')}")
             
             # Upsert the batch
             if docs_with_embeddings:
@@ -623,6 +1055,29 @@ def ingest_from_confluence(space_key: str = None):
         print(f"❌ Error during ingestion: {e}")
         raise
 
+def iter_local_doc_files(docs_folder):
+    """
+    Yield the paths of supported files (.txt, .md, .pdf) under a folder
+    Walks with os.scandir, whose entries already know their type, so no extra stat per file
+    """
+    stack = [docs_folder]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    stack.append(entry.path)
+                elif entry.is_file() and entry.name.lower().endswith(LOCAL_DOC_EXTENSIONS):
+                    yield entry.path
+
+def _file_size(filepath):
+    """
+    Size of a file in bytes, 0 if it can't be read
+    """
+    try:
+        return os.path.getsize(filepath)
+    except OSError:
+        return 0
+
 def ingest_from_local_docs():
     """
     Ingest documents from local docs folder
@@ -638,13 +1093,9 @@ def ingest_from_local_docs():
         # Create collection if it doesn't exist
         create_collection()
         
-        # Get all files in docs folder
-        files = []
-        for root, dirs, filenames in os.walk(docs_folder):
-            for filename in filenames:
-                if filename.endswith(('.txt', '.md', '.pdf')):
-                    filepath = os.path.join(root, filename)
-                    files.append(filepath)
+        # Get all files in docs folder, smallest first so each embedding batch holds texts of
+        # similar length (the embedding server pads a batch to its longest input)
+        files = sorted(iter_local_doc_files(docs_folder), key=_file_size)
         
         if not files:
             print("❌ No supported files found in docs folder")
@@ -652,59 +1103,108 @@ def ingest_from_local_docs():
         
         print(f"📄 Found {len(files)} files to process")
         
-        # Process files in batches
-        batch_size = 5
+        # Process files in batches (read concurrently, embedded with one batch request)
+        batch_size = LOCAL_DOCS_BATCH_SIZE
         total_processed = 0
         
-        for i in range(0, len(files), batch_size):
-            batch = files[i:i + batch_size]
-            print(f"🔄 Processing batch {i//batch_size + 1}/{(len(files) + batch_size - 1)//batch_size}")
-            
-            docs_with_embeddings = []
-            
-            for filepath in batch:
-                try:
-                    filename = os.path.basename(filepath)
-                    print(f"  📄 Processing file: {filename}")
+        def read_file(filepath):
+            try:
+                # PDFs go through the PDF text extractor (on a worker process), streamed from disk
+                if filepath.lower().endswith('.pdf'):
+                    return pdf_pool.submit(extract_pdf_file_text, filepath).result(), None
+                with open(filepath, 'r', encoding='utf-8') as f:
+                    return f.read(), None
+            except Exception as e:
+                return None, e
+        
+        def load_batch(batch):
+            # Read a batch of files and embed the non-empty ones whose content isn't stored yet (runs on the embed pool)
+            read_results = list(zip(batch, read_pool.map(read_file, batch)))
+            batch_files = [
+                (filepath, os.path.basename(filepath), content)
+                for filepath, (content, error) in read_results
+                if error is None and content.strip()
+            ]
+            content_hashes = get_content_hashes(content for _, _, content in batch_files)
+            # A file is unchanged only if its content is stored under its own path
+            stored_versions = existing_file_versions(
+                (filepath, content_hash) for (filepath, _, _), content_hash in zip(batch_files, content_hashes)
+            )
+            unchanged = set()
+            changed_files = []
+            for (filepath, filename, content), content_hash in zip(batch_files, content_hashes):
+                if (filepath, content_hash) in stored_versions:
+                    unchanged.add(filepath)
+                else:
+                    changed_files.append((filepath, filename, content, content_hash))
+            vectors = get_embeddings([content for _, _, content, _ in changed_files]) if changed_files else []
+            return read_results, unchanged, changed_files, vectors
+        
+        batches = [files[i:i + batch_size] for i in range(0, len(files), batch_size)]
+        
+        # PDF parsing is CPU-bound, so it runs on PDF_WORKERS processes (only started if there are PDFs)
+        pdf_pool = None
+        if any(filepath.lower().endswith('.pdf') for filepath in files):
+            pdf_pool = ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=multiprocessing.get_context("spawn"),
+                                           initializer=_ignore_sigint)
+        
+        # Up to LOCAL_EMBED_CONCURRENCY batches are read and embedded at once; results are handled in order
+        begin_bulk_ingest()
+        try:
+            with ThreadPoolExecutor(max_workers=LOCAL_READ_WORKERS, thread_name_prefix="local-read") as read_pool, \
+                 ThreadPoolExecutor(max_workers=LOCAL_EMBED_CONCURRENCY, thread_name_prefix="local-embed") as embed_pool:
+                loaded = _bounded_map(embed_pool, load_batch, batches, LOCAL_EMBED_CONCURRENCY)
+                for batch_num, (read_results, unchanged, batch_files, vectors) in enumerate(loaded, 1):
+                    print(f"🔄 Processing batch {batch_num}/{len(batches)}")
                     
-                    # Read file content
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        content = f.read()
+                    for filepath, (content, error) in read_results:
+                        filename = os.path.basename(filepath)
+                        log.debug("  📄 Processing file: %s", filename)
+                        
+                        if error is not None:
+                            print(f"    ❌ Error processing file {filename}: {error}")
+                        elif not content.strip():
+                            print(f"    ⚠️ Empty file: {filename}")
+                        elif filepath in unchanged:
+                            log.debug("    ⏭️ Skipping unchanged: %s", filename)
                     
-                    if not content.strip():
-                        print(f"    ⚠️ Empty file: {filename}")
-                        continue
+                    # Pair the batch's embeddings with its files
+                    docs_with_embeddings = []
+                    for (filepath, filename, content, content_hash), vector in zip(batch_files, vectors):
+                        if vector:
+                            docs_with_embeddings.append({
+                                "text": content,
+                                "vector": vector,
+                                "metadata": {
+                                    "filename": filename,
+                                    "filepath": filepath,
+                                    "file_type": os.path.splitext(filename)[1],
+                                    "file_size": len(content),
+                                    "content_hash": content_hash
+                                }
+                            })
+                            total_processed += 1
+                            log.debug("    ✅ Added to batch: %s", filename)
+                        else:
+                            print(f"    ⚠️ Failed to get embedding for: {filename}")
                     
-                    # Get embedding for the file content
-                    vector = get_embedding(content)
-                    if vector:
-                        docs_with_embeddings.append({
-                            "text": content,
-                            "vector": vector,
-                            "metadata": {
-                                "filename": filename,
-                                "filepath": filepath,
-                                "file_type": os.path.splitext(filename)[1],
-                                "file_size": len(content)
-                            }
-                        })
-                        total_processed += 1
-                        print(f"    ✅ Added to batch: {filename}")
-                    else:
-                        print(f"    ⚠️ Failed to get embedding for: {filename}")
-                        
-                except Exception as e:
-                    print(f"    ❌ Error processing file {filename}: {e}")
-                    continue
-            
-            # Upsert the batch
-            if docs_with_embeddings:
-                try:
-                    upsert_embeddings(docs_with_embeddings)
-                    print(f"  ✅ Processed {len(docs_with_embeddings)} documents in this batch")
-                except Exception as e:
-                    print(f"  ❌ Error upserting batch: {e}")
-                    continue
+                    # Upsert the batch
+                    if docs_with_embeddings:
+                        try:
+                            upsert_embeddings(docs_with_embeddings)
+                            print(f"  ✅ Processed {len(docs_with_embeddings)} documents in this batch"
+                                  f" ({len(unchanged)} unchanged, {len(read_results)} files read)")
+                        except Exception as e:
+                            print(f"  ❌ Error upserting batch: {e}")
+                            continue
+                    elif unchanged:
+                        print(f"  ⏭️ {len(unchanged)} unchanged files skipped in this batch")
+        finally:
+            if pdf_pool is not None:
+                pdf_pool.shutdown(wait=True, cancel_futures=True)
+            finalize_ingest()
+            # Cached chat answers may cite replaced content now
+            invalidate_qa_cache()
         
         print(f"\n🎉 Successfully ingested {total_processed} documents from local docs folder")
         
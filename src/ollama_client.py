@@ -1,8 +1,26 @@
 # src/ollama_client.py
 
 import requests
+from requests.adapters import HTTPAdapter
 import os
+import json
+import threading
+from typing import List
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from src.embed_cache import text_key, get_vectors as get_cached_vectors, put_vectors as put_cached_vectors
+
+# orjson decodes the float arrays of embedding responses much faster than the stdlib
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# FastEmbed (ONNX Runtime, in-process) as an optional embedding backend
+try:
+    from fastembed import TextEmbedding
+except ImportError:
+    TextEmbedding = None
 
 # Load environment variables
 load_dotenv()
@@ -12,17 +30,76 @@ OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434")
 EMBEDDING_MODEL = "nomic-embed-text"
 LLM_MODEL = "llama2"
 
+# EMBEDDING_BACKEND=fastembed computes embeddings in-process with the same nomic model (768
+# dimensions, so existing collections stay compatible) instead of calling Ollama
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "ollama").lower()
+FASTEMBED_MODEL = os.getenv("FASTEMBED_MODEL", "nomic-ai/nomic-embed-text-v1.5")
+USE_FASTEMBED = EMBEDDING_BACKEND == "fastembed" and TextEmbedding is not None
+if EMBEDDING_BACKEND == "fastembed" and TextEmbedding is None:
+    print("⚠️ EMBEDDING_BACKEND=fastembed but fastembed is not installed, using Ollama")
+# Model the embeddings actually come from (part of the embedding cache key)
+ACTIVE_EMBEDDING_MODEL = FASTEMBED_MODEL if USE_FASTEMBED else EMBEDDING_MODEL
+
+# Embeddings are cached on disk by text (src/embed_cache); EMBED_CACHE=false turns this off
+EMBED_CACHE_ENABLED = os.getenv("EMBED_CACHE", "true").lower() == "true"
+
+# How long Ollama keeps the model (and its cached prompt prefix) loaded after a request
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+
+# Answer returned when generation fails
+MODEL_ERROR_MESSAGE = "Error calling language model."
+
+# Concurrent /api/embeddings requests when the batch endpoint isn't available
+EMBED_FALLBACK_WORKERS = 8
+
+# (connect, read) timeout in seconds; generation and large embedding batches can take minutes
+OLLAMA_TIMEOUT = (5, int(os.getenv("OLLAMA_READ_TIMEOUT", 300)))
+
+# One keep-alive session for all Ollama requests, sized for the concurrent embedding threads
+session = requests.Session()
+_adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32)
+session.mount("http://", _adapter)
+session.mount("https://", _adapter)
+
+def _response_json(response):
+    """
+    Decode a JSON response body (orjson when available)
+    """
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
+
+_fastembed_model = None
+_fastembed_lock = threading.Lock()
+
+def _fastembed_embeddings(texts: List[str]) -> List[List[float]]:
+    """
+    Get embedding vectors in-process with FastEmbed (the model is loaded on first use).
+    """
+    global _fastembed_model
+    with _fastembed_lock:
+        if _fastembed_model is None:
+            _fastembed_model = TextEmbedding(FASTEMBED_MODEL)
+        return [vector.tolist() for vector in _fastembed_model.embed(list(texts))]
+
 def get_embedding(text: str):
     """
-    Get embedding vector for the given text using Ollama.
+    Get embedding vector for the given text using Ollama (or FastEmbed, see EMBEDDING_BACKEND).
     """
+    if USE_FASTEMBED:
+        try:
+            return _fastembed_embeddings([text])[0]
+        except Exception as e:
+            print(f"❌ Failed to get embedding: {e}")
+            return []
     try:
-        response = requests.post(
+        response = session.post(
             f"{OLLAMA_URL}/api/embeddings",
-            json={"model": EMBEDDING_MODEL, "prompt": text}
+            json={"model": EMBEDDING_MODEL, "prompt": text},
+            timeout=OLLAMA_TIMEOUT
         )
         response.raise_for_status()
-        data = response.json()
+        data = _response_json(response)
         embedding = data.get("embedding", [])
         if not embedding:
             print("⚠️ Warning: Empty embedding returned.")
@@ -31,28 +108,160 @@ def get_embedding(text: str):
         print(f"❌ Failed to get embedding: {e}")
         return []
 
-def call_model(prompt: str, context_length=8192):
+def _embed_each(texts: List[str]) -> List[List[float]]:
+    """
+    Get embeddings one request per text, EMBED_FALLBACK_WORKERS at a time, in input order.
+    """
+    if len(texts) == 1:
+        return [get_embedding(texts[0])]
+    with ThreadPoolExecutor(max_workers=min(EMBED_FALLBACK_WORKERS, len(texts))) as executor:
+        return list(executor.map(get_embedding, texts))
+
+def get_embeddings(texts: List[str]) -> List[List[float]]:
+    """
+    Get embedding vectors for several texts with one request to Ollama's batch
+    /api/embed endpoint. Vectors come back in input order; a text whose embedding
+    failed gets an empty list. Falls back to one get_embedding call per text on
+    Ollama versions without /api/embed.
+    Texts embedded before with the same model come from the on-disk embedding cache.
+    """
+    texts = list(texts)
+    if not texts:
+        return []
+    if not EMBED_CACHE_ENABLED:
+        return _request_embeddings(texts)
+    
+    try:
+        keys = [text_key(ACTIVE_EMBEDDING_MODEL, text) for text in texts]
+        vectors_by_key = get_cached_vectors(set(keys))
+    except Exception as e:
+        print(f"⚠️ Embedding cache unavailable: {e}")
+        return _request_embeddings(texts)
+    
+    # Each distinct uncached text is embedded once
+    missing = {}
+    for key, text in zip(keys, texts):
+        if key not in vectors_by_key:
+            missing.setdefault(key, text)
+    if missing:
+        vectors = _request_embeddings(list(missing.values()))
+        vectors_by_key.update(zip(missing, vectors))
+        try:
+            # Failed (empty) embeddings are not cached
+            put_cached_vectors([(key, vector) for key, vector in zip(missing, vectors) if vector])
+        except Exception as e:
+            print(f"⚠️ Could not update embedding cache: {e}")
+    
+    return [vectors_by_key[key] for key in keys]
+
+def _request_embeddings(texts: List[str]) -> List[List[float]]:
+    """
+    Get embedding vectors for several texts from Ollama or FastEmbed (see get_embeddings)
+    """
+    if USE_FASTEMBED:
+        try:
+            return _fastembed_embeddings(texts)
+        except Exception as e:
+            print(f"❌ Failed to get embeddings: {e}")
+            return [[] for _ in texts]
+    try:
+        response = session.post(
+            f"{OLLAMA_URL}/api/embed",
+            json={"model": EMBEDDING_MODEL, "input": list(texts)},
+            timeout=OLLAMA_TIMEOUT
+        )
+        if response.status_code == 404:
+            return _embed_each(texts)
+        response.raise_for_status()
+        embeddings = _response_json(response).get("embeddings", [])
+        if len(embeddings) != len(texts):
+            print(f"⚠️ Warning: Got {len(embeddings)} embeddings for {len(texts)} texts.")
+            return _embed_each(texts)
+        return embeddings
+    except Exception as e:
+        print(f"❌ Failed to get embeddings: {e}")
+        return [[] for _ in texts]
+
+def _generate_request(prompt, context_length, system, stream):
+    """
+    Body of an /api/generate request. A static system prompt goes in the separate system
+    field so it stays the same prompt prefix across requests, which Ollama can reuse from
+    its cache while the model is kept loaded (keep_alive) instead of evaluating it again.
+    """
+    body = {
+        "model": LLM_MODEL,
+        "prompt": prompt,
+        "stream": stream,
+        "keep_alive": OLLAMA_KEEP_ALIVE,
+        "options": {
+            "num_ctx": context_length  # Increase context window
+        }
+    }
+    if system:
+        body["system"] = system
+    return body
+
+def call_model(prompt: str, context_length=8192, system=None):
     """
     Get a response from a language model using Ollama.
     
     Args:
         prompt: The prompt to send to the model
         context_length: Maximum context length (default: 8192 tokens)
+        system: Optional system prompt (instructions that are the same for every request)
     """
     try:
-        response = requests.post(
+        response = session.post(
             f"{OLLAMA_URL}/api/generate",
-            json={
-                "model": LLM_MODEL, 
-                "prompt": prompt, 
-                "stream": False,
-                "options": {
-                    "num_ctx": context_length  # Increase context window
-                }
-            }
+            json=_generate_request(prompt, context_length, system, stream=False),
+            timeout=OLLAMA_TIMEOUT
         )
         response.raise_for_status()
         return response.json().get("response", "").strip()
     except Exception as e:
         print(f"❌ Error calling model: {e}")
-        return "Error calling language model."
+        return MODEL_ERROR_MESSAGE
+
+def call_model_stream(prompt: str, context_length=8192, system=None, status=None):
+    """
+    Get a response from a language model using Ollama, yielding the text as it is generated.
+    
+    Args:
+        prompt: The prompt to send to the model
+        context_length: Maximum context length (default: 8192 tokens)
+        system: Optional system prompt (instructions that are the same for every request)
+        status: Optional dict; status["done"] is set to True once the model finished the response
+                (it stays False when the stream ended early, e.g. on an error mid-answer)
+    """
+    if status is not None:
+        status["done"] = False
+    started = False
+    try:
+        with session.post(
+            f"{OLLAMA_URL}/api/generate",
+            json=_generate_request(prompt, context_length, system, stream=True),
+            stream=True,
+            timeout=OLLAMA_TIMEOUT
+        ) as response:
+            response.raise_for_status()
+            # One JSON object per line, each carrying the next piece of the response
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = orjson.loads(line) if orjson is not None else json.loads(line)
+                text = chunk.get("response", "")
+                if text:
+                    # Drop leading whitespace like call_model's strip()
+                    if not started:
+                        text = text.lstrip()
+                    if text:
+                        started = True
+                        yield text
+                if chunk.get("done"):
+                    if status is not None:
+                        status["done"] = True
+                    break
+    except Exception as e:
+        print(f"❌ Error calling model: {e}")
+        if not started:
+            yield MODEL_ERROR_MESSAGE
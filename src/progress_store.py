@@ -0,0 +1,355 @@
+# src/progress_store.py
+
+import os
+import json
+import time
+import atexit
+import sqlite3
+import threading
+from datetime import datetime
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+PROGRESS_DIR = "progress"
+PROGRESS_DB_PATH = os.path.join(PROGRESS_DIR, "ingestion.db")
+LEGACY_PROGRESS_PATH = os.path.join(PROGRESS_DIR, "ingestion_progress.json")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    page_id TEXT PRIMARY KEY,
+    content_hash BLOB,
+    space_key TEXT,
+    last_processed INTEGER,
+    metadata TEXT,
+    page_title TEXT,
+    space_name TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_pages_last_processed ON pages (last_processed);
+CREATE TABLE IF NOT EXISTS page_bodies (
+    page_id TEXT PRIMARY KEY,
+    body_hash BLOB,
+    version INTEGER,
+    attachments TEXT
+);
+CREATE TABLE IF NOT EXISTS summary (
+    k TEXT PRIMARY KEY,
+    v TEXT
+);
+"""
+
+# Columns added after the first release of the schema, created on open when missing
+PAGE_COLUMN_MIGRATIONS = (("page_title", "TEXT"), ("space_name", "TEXT"))
+PAGE_BODY_COLUMN_MIGRATIONS = (("version", "INTEGER"), ("attachments", "TEXT"))
+
+STATUS_SUMMARY_KEYS = ("last_run", "total_documents", "processed_spaces", "last_updated", "current_progress")
+
+# Page writes are grouped into one transaction, committed every N pages or T seconds
+COMMIT_EVERY_PAGES = 100
+COMMIT_EVERY_SECONDS = 60
+
+_connection = None
+_lock = threading.Lock()
+_pages_since_commit = 0
+_last_commit = time.monotonic()
+
+def progress_exists():
+    """
+    Check whether any ingestion progress has been recorded yet
+    """
+    return os.path.exists(PROGRESS_DB_PATH) or os.path.exists(LEGACY_PROGRESS_PATH)
+
+def get_connection():
+    """
+    Open (once per process) the progress database in WAL mode
+    """
+    global _connection
+    with _lock:
+        if _connection is None:
+            os.makedirs(PROGRESS_DIR, exist_ok=True)
+
+            conn = sqlite3.connect(PROGRESS_DB_PATH, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            _migrate_schema(conn)
+
+            # Import until something is recorded, so a failed import is retried on the next run
+            if os.path.exists(LEGACY_PROGRESS_PATH) and _is_empty(conn):
+                _import_legacy_progress(conn)
+
+            _connection = conn
+    return _connection
+
+def _is_empty(conn):
+    """
+    Whether the database has no recorded pages or summary values yet
+    """
+    return (conn.execute("SELECT 1 FROM pages LIMIT 1").fetchone() is None
+            and conn.execute("SELECT 1 FROM summary LIMIT 1").fetchone() is None)
+
+def _migrate_schema(conn):
+    """
+    Add columns missing from databases created by older versions
+    """
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(pages)")}
+    for column, column_type in PAGE_COLUMN_MIGRATIONS:
+        if column not in existing:
+            # Backfill from the metadata JSON, where these values are also kept under the same key
+            conn.execute(f"ALTER TABLE pages ADD COLUMN {column} {column_type}")
+            conn.execute(f"UPDATE pages SET {column} = json_extract(metadata, '$.{column}')")
+    
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(page_bodies)")}
+    for column, column_type in PAGE_BODY_COLUMN_MIGRATIONS:
+        if column not in existing:
+            # Left NULL: those pages are fetched in full once
+            conn.execute(f"ALTER TABLE page_bodies ADD COLUMN {column} {column_type}")
+
+def _dumps(value):
+    """
+    Encode a value as JSON text for the database (orjson when available)
+    """
+    if orjson is not None:
+        return orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(value, default=str)
+
+def _loads(value):
+    """
+    Decode a JSON value from the database (orjson when available)
+    """
+    if orjson is not None:
+        return orjson.loads(value)
+    return json.loads(value)
+
+def _to_timestamp(value):
+    """
+    Convert an ISO timestamp from the legacy JSON file to epoch seconds
+    """
+    try:
+        return int(datetime.fromisoformat(value).timestamp())
+    except (TypeError, ValueError):
+        return None
+
+def format_timestamp(value):
+    """
+    Render an epoch-seconds timestamp for display
+    """
+    if value is None:
+        return "Unknown"
+    return datetime.fromtimestamp(value).isoformat()
+
+def _import_legacy_progress(conn):
+    """
+    One-time import of progress/ingestion_progress.json into the database
+    """
+    try:
+        with open(LEGACY_PROGRESS_PATH, "rb") as f:
+            legacy = _loads(f.read())
+
+        conn.execute("BEGIN")
+        conn.executemany(
+            "INSERT OR REPLACE INTO pages (page_id, content_hash, space_key, last_processed, metadata, page_title, space_name) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    page_id,
+                    info.get("content_hash"),
+                    info.get("metadata", {}).get("space_key"),
+                    _to_timestamp(info.get("last_processed")),
+                    _dumps(info.get("metadata", {})),
+                    info.get("metadata", {}).get("page_title"),
+                    info.get("metadata", {}).get("space_name")
+                )
+                for page_id, info in legacy.get("processed_pages", {}).items()
+            ]
+        )
+        conn.executemany(
+            "INSERT OR REPLACE INTO summary (k, v) VALUES (?, ?)",
+            [
+                (key, _dumps(legacy[key]))
+                for key in ("last_run", "processed_spaces", "total_documents", "last_updated", "current_progress")
+                if key in legacy
+            ]
+        )
+        conn.execute("COMMIT")
+        print(f"✅ Imported legacy progress from {LEGACY_PROGRESS_PATH}")
+    except Exception as e:
+        # Reading or parsing the file fails before the transaction starts
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        print(f"⚠️ Error importing legacy progress: {e}")
+
+def _write(conn, sql, params, page_write=False):
+    """
+    Run a write inside the open batch transaction (caller holds _lock), committing
+    once enough pages or time have accumulated
+    """
+    global _pages_since_commit, _last_commit
+    if not conn.in_transaction:
+        conn.execute("BEGIN")
+    if isinstance(params, list):
+        conn.executemany(sql, params)
+    else:
+        conn.execute(sql, params)
+    
+    if page_write:
+        _pages_since_commit += 1
+    if _pages_since_commit >= COMMIT_EVERY_PAGES or time.monotonic() - _last_commit >= COMMIT_EVERY_SECONDS:
+        conn.execute("COMMIT")
+        _pages_since_commit = 0
+        _last_commit = time.monotonic()
+
+def flush():
+    """
+    Commit any progress writes still pending in the batch transaction
+    """
+    global _pages_since_commit, _last_commit
+    if _connection is None:
+        return
+    with _lock:
+        if _connection.in_transaction:
+            _connection.execute("COMMIT")
+        _pages_since_commit = 0
+        _last_commit = time.monotonic()
+
+def compact():
+    """
+    Commit pending writes and fold the write-ahead log back into the database file,
+    truncating it (called once at the end of a run)
+    """
+    flush()
+    if _connection is None:
+        return
+    with _lock:
+        _connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+# Never lose the last partial batch on a normal interpreter exit
+atexit.register(flush)
+
+def get_summary(keys):
+    """
+    Get summary values (decoded from JSON) for the given keys
+    """
+    conn = get_connection()
+    placeholders = ",".join("?" for _ in keys)
+    with _lock:
+        rows = conn.execute(f"SELECT k, v FROM summary WHERE k IN ({placeholders})", list(keys)).fetchall()
+    return {k: _loads(v) for k, v in rows}
+
+def set_summary(values):
+    """
+    Upsert summary values (encoded as JSON)
+    """
+    conn = get_connection()
+    with _lock:
+        _write(
+            conn,
+            "INSERT INTO summary (k, v) VALUES (?, ?) ON CONFLICT(k) DO UPDATE SET v = excluded.v",
+            [(k, _dumps(v)) for k, v in values.items()]
+        )
+
+def get_page_hash(page_id):
+    """
+    Get the stored content hash for a page, or None if it was never processed
+    """
+    conn = get_connection()
+    with _lock:
+        row = conn.execute("SELECT content_hash FROM pages WHERE page_id = ?", (page_id,)).fetchone()
+    return row[0] if row else None
+
+def upsert_page(page_id, content_hash, space_key, metadata, last_processed=None):
+    """
+    Record (or replace) the processing state of a single page
+    """
+    if last_processed is None:
+        last_processed = int(datetime.now().timestamp())
+
+    conn = get_connection()
+    with _lock:
+        _write(
+            conn,
+            """
+            INSERT INTO pages (page_id, content_hash, space_key, last_processed, metadata, page_title, space_name)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(page_id) DO UPDATE SET
+                content_hash = excluded.content_hash,
+                space_key = excluded.space_key,
+                last_processed = excluded.last_processed,
+                metadata = excluded.metadata,
+                page_title = excluded.page_title,
+                space_name = excluded.space_name
+            """,
+            (page_id, content_hash, space_key, last_processed, _dumps(metadata),
+             metadata.get("page_title"), metadata.get("space_name")),
+            page_write=True
+        )
+
+def get_body_hash(page_id):
+    """
+    Get the stored storage-HTML hash for a Confluence page, or None
+    """
+    conn = get_connection()
+    with _lock:
+        row = conn.execute("SELECT body_hash FROM page_bodies WHERE page_id = ?", (page_id,)).fetchone()
+    return row[0] if row else None
+
+def get_body_version(page_id):
+    """
+    Get the Confluence version number recorded with a page's body hash, or None
+    """
+    conn = get_connection()
+    with _lock:
+        row = conn.execute("SELECT version FROM page_bodies WHERE page_id = ?", (page_id,)).fetchone()
+    return row[0] if row else None
+
+def get_body_attachments(page_id):
+    """
+    Get the attachment versions key recorded with a page's body hash, or None
+    """
+    conn = get_connection()
+    with _lock:
+        row = conn.execute("SELECT attachments FROM page_bodies WHERE page_id = ?", (page_id,)).fetchone()
+    return row[0] if row else None
+
+def set_body_hash(page_id, body_hash, version=None, attachments=None):
+    """
+    Record the storage-HTML hash (with the version number and attachment versions key) of a
+    fully ingested Confluence page
+    """
+    conn = get_connection()
+    with _lock:
+        _write(
+            conn,
+            "INSERT INTO page_bodies (page_id, body_hash, version, attachments) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(page_id) DO UPDATE SET body_hash = excluded.body_hash, version = excluded.version, "
+            "attachments = excluded.attachments",
+            (page_id, body_hash, version, attachments)
+        )
+
+def get_page_stats():
+    """
+    Get (page count, most recent last_processed) over all recorded pages
+    """
+    conn = get_connection()
+    with _lock:
+        return conn.execute("SELECT COUNT(*), MAX(last_processed) FROM pages").fetchone()
+
+def get_recent_pages(limit=20):
+    """
+    Get the most recently processed pages as (page_id, last_processed, page_title, space_name) tuples
+    """
+    conn = get_connection()
+    with _lock:
+        return conn.execute(
+            "SELECT page_id, last_processed, page_title, space_name FROM pages ORDER BY last_processed DESC LIMIT ?",
+            (limit,)
+        ).fetchall()
+
+def load_status_snapshot():
+    """
+    Get the summary values plus page stats shown by status commands
+    """
+    snapshot = get_summary(STATUS_SUMMARY_KEYS)
+    snapshot["page_count"], snapshot["last_processed"] = get_page_stats()
+    return snapshot
@@ -0,0 +1,159 @@
+# src/qa_cache.py
+
+import os
+import time
+import uuid
+import hashlib
+import threading
+from collections import OrderedDict
+from qdrant_client.models import VectorParams, Distance, PointStruct
+from src.vector_store import client
+
+# Answers to repeated questions are reused instead of running retrieval and the LLM again:
+# exact repeats (same normalized text) from memory, near-duplicates through a Qdrant
+# collection of past question embeddings. QA_CACHE=false turns this off.
+QA_CACHE_ENABLED = os.getenv("QA_CACHE", "true").lower() == "true"
+QUERY_CACHE_COLLECTION = "query_cache"
+# Minimum cosine similarity for a past question to count as the same question
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("QA_CACHE_THRESHOLD", 0.97))
+# Seconds a cached answer stays valid (answers go stale as documents are re-ingested)
+QA_CACHE_TTL = int(os.getenv("QA_CACHE_TTL", 24 * 3600))
+EXACT_CACHE_SIZE = 1024
+# Touched by every ingestion run (invalidate); answers cached before its mtime are stale.
+# A file so the web app's in-memory entries are invalidated by ingestion in other processes.
+INVALIDATED_MARKER_PATH = os.path.join("progress", "qa_cache.invalidated")
+
+# sha1(normalized query) -> (vector, answer, sources, ts), least recently used first
+_exact_cache = OrderedDict()
+_lock = threading.Lock()
+_collection_ready = False
+
+def normalize_query(query):
+    """
+    Normalize a question for exact-match lookups
+    """
+    return " ".join(query.strip().lower().split())
+
+def _query_key(query):
+    """
+    Exact-match cache key of a question
+    """
+    return hashlib.sha1(normalize_query(query).encode("utf-8")).hexdigest()
+
+def _invalidated_at():
+    """
+    Time of the last invalidate() (0 if never)
+    """
+    try:
+        return os.stat(INVALIDATED_MARKER_PATH).st_mtime
+    except OSError:
+        return 0
+
+def _fresh(ts):
+    """
+    Whether a cache entry stored at ts is still within QA_CACHE_TTL and newer than the last ingestion
+    """
+    return time.time() - ts < QA_CACHE_TTL and ts > _invalidated_at()
+
+def lookup_exact(query):
+    """
+    Get the cached (vector, answer, sources) of an exact repeat of the question, or None
+    """
+    if not QA_CACHE_ENABLED:
+        return None
+    key = _query_key(query)
+    with _lock:
+        entry = _exact_cache.get(key)
+        if entry is None:
+            return None
+        if not _fresh(entry[3]):
+            del _exact_cache[key]
+            return None
+        _exact_cache.move_to_end(key)
+        return entry[:3]
+
+def lookup_similar(vector):
+    """
+    Get the cached (answer, sources) of a past question whose embedding is at least
+    SEMANTIC_CACHE_THRESHOLD similar to the given one, or None
+    """
+    if not QA_CACHE_ENABLED or not vector:
+        return None
+    try:
+        results = client.search(
+            collection_name=QUERY_CACHE_COLLECTION,
+            query_vector=vector,
+            limit=1,
+            score_threshold=SEMANTIC_CACHE_THRESHOLD,
+            with_payload=True
+        )
+    except Exception:
+        # The collection doesn't exist until the first answer is stored
+        return None
+    if not results or not _fresh(results[0].payload.get("ts", 0)):
+        return None
+    payload = results[0].payload
+    return payload.get("answer", ""), payload.get("sources", [])
+
+def invalidate():
+    """
+    Drop all cached answers after the indexed documents changed (called at the end of ingestion)
+    """
+    if not QA_CACHE_ENABLED:
+        return
+    try:
+        os.makedirs(os.path.dirname(INVALIDATED_MARKER_PATH), exist_ok=True)
+        with open(INVALIDATED_MARKER_PATH, "a"):
+            os.utime(INVALIDATED_MARKER_PATH)
+    except OSError as e:
+        print(f"⚠️ Could not invalidate the answer cache: {e}")
+    # Points in the query cache collection are kept: _fresh rejects those older than the
+    # marker, and deleting the collection would break a web app that already created it
+    with _lock:
+        _exact_cache.clear()
+
+def _ensure_collection(dimension):
+    """
+    Create the query cache collection on first use
+    """
+    global _collection_ready
+    if _collection_ready:
+        return
+    try:
+        client.create_collection(
+            collection_name=QUERY_CACHE_COLLECTION,
+            vectors_config=VectorParams(size=dimension, distance=Distance.COSINE)
+        )
+    except Exception as e:
+        if "already exists" not in str(e):
+            raise
+    _collection_ready = True
+
+def store_answer(query, vector, answer, sources):
+    """
+    Cache the answer and sources of a question in memory and in the query cache collection
+    """
+    if not QA_CACHE_ENABLED or not vector:
+        return
+    ts = time.time()
+    key = _query_key(query)
+    with _lock:
+        _exact_cache[key] = (vector, answer, sources, ts)
+        _exact_cache.move_to_end(key)
+        while len(_exact_cache) > EXACT_CACHE_SIZE:
+            _exact_cache.popitem(last=False)
+
+    try:
+        _ensure_collection(len(vector))
+        client.upsert(
+            collection_name=QUERY_CACHE_COLLECTION,
+            points=[PointStruct(
+                # One point per normalized question, so asking again refreshes it
+                id=str(uuid.UUID(key[:32])),
+                vector=vector,
+                payload={"query": query, "answer": answer, "sources": sources, "ts": ts}
+            )],
+            wait=False
+        )
+    except Exception as e:
+        print(f"⚠️ Could not update query cache: {e}")
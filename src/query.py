@@ -1,8 +1,9 @@
 # src/query.py
 
 import os
-from src.ollama_client import get_embedding, call_model
-from src.vector_store import search_similar, get_collection_stats, collection_exists
+from concurrent.futures import ThreadPoolExecutor
+from src.ollama_client import get_embedding, call_model, call_model_stream
+from src.vector_store import search_similar, get_collection_stats, collection_exists, payload_text
 from src.config_loader import load_qa_config
 
 # Load configuration
@@ -10,11 +11,18 @@ config = load_qa_config()
 DEFAULT_TOP_K = config["search_settings"]["top_k"]
 MAX_CONTEXT_CHARS = config["context_settings"]["max_context_chars"]
 
-def get_answer(query, top_k=DEFAULT_TOP_K):
+# Embeds the query while the collection checks run
+_query_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="query-embed")
+
+def get_answer(query, top_k=DEFAULT_TOP_K, stream=False):
     """
     Get answer for a query with graceful fallback when no data is available
+    With stream=True a successful answer is an iterator over the text as the model generates it
     """
     try:
+        # Start embedding the query right away; the Qdrant checks below run meanwhile
+        query_vector_future = _query_pool.submit(get_embedding, query)
+        
         # Check if collection exists and has data
         if not collection_exists():
             return {
@@ -35,7 +43,7 @@ def get_answer(query, top_k=DEFAULT_TOP_K):
             }
         
         # Get query embedding
-        query_vector = get_embedding(query)
+        query_vector = query_vector_future.result()
         if not query_vector:
             return {
                 "answer": "Sorry, I couldn't process your query. Please try again.",
@@ -56,22 +64,30 @@ def get_answer(query, top_k=DEFAULT_TOP_K):
             }
         
         # Build context from results
-        context = ""
+        context_parts = []
+        context_length = 0
         sources = []
         
         for result in results:
-            text = result.payload.get("text", "")
-            metadata = {k: v for k, v in result.payload.items() if k != "text"}
+            text = payload_text(result.payload)
             
             # Add to context if we haven't exceeded the limit
-            if len(context) + len(text) < MAX_CONTEXT_CHARS:
-                context += text + "\n\n"
+            if context_length + len(text) < MAX_CONTEXT_CHARS:
+                # The payload is this result's own dict, so the text fields are dropped in place
+                metadata = result.payload
+                metadata.pop("text", None)
+                metadata.pop("text_prefix", None)
+                context_parts.append(text)
+                context_parts.append("\n\n")
+                context_length += len(text) + 2
                 sources.append({
                     "text": text[:200] + "..." if len(text) > 200 else text,
                     "metadata": metadata,
                     "score": result.score
                 })
         
+        context = "".join(context_parts)
+        
         # Generate answer using LLM
         prompt = f"""Based on the following context, answer the user's question. If the context doesn't contain relevant information, say so.
 
@@ -82,7 +98,7 @@ Question: {query}
 
 Answer:"""
 
-        answer = call_model(prompt)
+        answer = call_model_stream(prompt) if stream else call_model(prompt)
         
         # Determine confidence based on results
         if results and results[0].score > 0.7:
@@ -137,10 +153,16 @@ def main():
                 continue
             
             print("\n🔍 Searching...")
-            result = get_answer(query)
+            result = get_answer(query, stream=True)
             
-            # Print answer
-            print(f"\n💬 Answer: {result['answer']}")
+            # Print answer (streamed as it is generated)
+            if isinstance(result['answer'], str):
+                print(f"\n💬 Answer: {result['answer']}")
+            else:
+                print("\n💬 Answer: ", end='', flush=True)
+                for text in result['answer']:
+                    print(text, end='', flush=True)
+                print()
             
             # Print status info
             if result['status'] == 'success':
@@ -0,0 +1,57 @@
+# src/rag_pipeline.py
+
+from src.ollama_client import get_embedding, MODEL_ERROR_MESSAGE
+from src.vector_store import search_similar, get_context_config
+from src.qa_cache import lookup_exact, lookup_similar, store_answer
+
+def doc_source(i, payload):
+    """
+    Source entry shown for the i-th retrieved document
+    """
+    return {
+        "id": i,
+        "title": payload.get("page_title") or payload.get("title") or payload.get("attachment_title") or "Unknown",
+        "url": payload.get("url", ""),
+        "content_type": payload.get("content_type", "page"),
+        "space_name": payload.get("space_name", "")
+    }
+
+def run_retrieval(query):
+    """
+    Embed a question, retrieve its documents and build their sources, answering repeated
+    questions from the QA cache (exact repeat first, then a near-duplicate).
+
+    Returns a dict whose status is:
+        "cached": answer and sources come from the cache
+        "success": vector, docs and sources are set; the answer still has to be generated
+        "embedding_error" / "no_matches": nothing to answer from
+    """
+    cached = lookup_exact(query)
+    if not cached:
+        vector = get_embedding(query)
+        if not vector:
+            return {"status": "embedding_error"}
+        cached = lookup_similar(vector)
+
+    if cached:
+        answer, sources = cached[-2:]
+        return {"status": "cached", "answer": answer, "sources": sources}
+
+    docs = search_similar(vector, limit=get_context_config()["top_k"])
+    if not docs:
+        return {"status": "no_matches"}
+
+    return {
+        "status": "success",
+        "vector": vector,
+        "docs": docs,
+        "sources": [doc_source(i, doc.payload) for i, doc in enumerate(docs, 1)]
+    }
+
+def remember_answer(query, retrieval, answer, complete=True):
+    """
+    Cache the answer generated for a successful retrieval; failed generations and streamed
+    answers that ended early (complete=False) are not cached
+    """
+    if complete and answer != MODEL_ERROR_MESSAGE:
+        store_answer(query, retrieval["vector"], answer, retrieval["sources"])
@@ -1,17 +1,55 @@
 # src/vector_store.py
 
 import os
+import logging
+import re
 import textwrap
+import threading
+import time
+import uuid
+import numpy as np
 from qdrant_client import QdrantClient
-from qdrant_client.models import VectorParams, Distance, PointStruct
-from src.ollama_client import call_model
+from qdrant_client.models import (
+    VectorParams, Distance, HnswConfigDiff, OptimizersConfigDiff,
+    ScalarQuantization, ScalarQuantizationConfig, ScalarType,
+    BinaryQuantization, BinaryQuantizationConfig,
+    Filter, FieldCondition, MatchAny, PayloadSchemaType, SearchRequest, FilterSelector, HasIdCondition,
+    SearchParams, QuantizationSearchParams
+)
+from src.ollama_client import call_model, call_model_stream
 from src.config_loader import load_qa_config
 from qdrant_client.http.exceptions import UnexpectedResponse
 import requests
+from requests.adapters import HTTPAdapter
+
+log = logging.getLogger(__name__)
 
 QDRANT_HOST = os.getenv("QDRANT_HOST", "localhost")
 QDRANT_PORT = int(os.getenv("QDRANT_PORT", 6333))
+QDRANT_GRPC_PORT = int(os.getenv("QDRANT_GRPC_PORT", 6334))
+QDRANT_PREFER_GRPC = os.getenv("QDRANT_PREFER_GRPC", "true").lower() == "true"
+QDRANT_TIMEOUT = int(os.getenv("QDRANT_TIMEOUT", 30))
+UPLOAD_BATCH_SIZE = 256
+# Upload processes for upserts that span several batches (small upserts stay in-process)
+UPLOAD_PARALLEL = min(8, os.cpu_count() or 1)
+QUANTIZATION_MODES = ("none", "int8", "binary")
+DEFAULT_QUANTIZATION = "int8"
 COLLECTION_NAME = "confluence_docs"
+# Qdrant's default indexing threshold (KB), restored when a bulk ingestion ends if the
+# collection's own threshold couldn't be read
+INDEXING_THRESHOLD = 20000
+# Metadata fields that identify a document; the point ID is derived from them so re-ingesting
+# a page, attachment or file overwrites its point instead of adding another one
+POINT_ID_FIELDS = ("page_id", "content_type", "attachment_id", "filepath")
+POINT_ID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, COLLECTION_NAME)
+# Payload fields returned by searches: the text and what answers and sources show
+# (bookkeeping fields like content_hash, last_updated or filepath stay on the server)
+SEARCH_PAYLOAD_FIELDS = [
+    "text", "text_prefix", "content", "page_id", "page_title", "title", "attachment_title",
+    "url", "content_type", "space_key", "space_name", "filename", "file_type"
+]
+# Dtype used to hold vectors between embedding and upload (upserts still send float32)
+BUFFER_VECTOR_DTYPE = np.float16
 
 # Load configuration
 config = load_qa_config()
@@ -20,36 +58,114 @@ config = load_qa_config()
 DEFAULT_TOP_K = config["context_settings"]["default_top_k"]
 DEFAULT_CONTEXT_LENGTH = config["context_settings"]["default_context_length"]
 MAX_CONTEXT_CHARS = config["context_settings"]["max_context_chars"]
+# Search accuracy/latency knobs: HNSW beam width (None = Qdrant's default) and, on quantized
+# collections, how many times limit candidates are fetched with the compressed vectors and
+# re-scored with the original ones (None/0 = no rescoring)
+SEARCH_HNSW_EF = config["context_settings"].get("hnsw_ef", 128)
+SEARCH_OVERSAMPLING = config["context_settings"].get("oversampling", 2.0)
 
-# Initialize client
-client = QdrantClient(host=QDRANT_HOST, port=QDRANT_PORT)
+# Answer debug logs are shown with main.py -v; enable_debug_logging=false keeps them off even then
+if not config["debug_settings"]["enable_debug_logging"]:
+    log.setLevel(logging.INFO)
 
-def collection_exists():
+# Initialize client (gRPC for point uploads, REST port kept for the direct HTTP helpers below)
+client = QdrantClient(host=QDRANT_HOST, port=QDRANT_PORT, grpc_port=QDRANT_GRPC_PORT, prefer_grpc=QDRANT_PREFER_GRPC,
+                      timeout=QDRANT_TIMEOUT)
+
+# Keep-alive session for the direct HTTP helpers, shared by the web app's request threads
+_http = requests.Session()
+_http.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=16))
+COLLECTION_URL = f"http://{QDRANT_HOST}:{QDRANT_PORT}/collections/{COLLECTION_NAME}"
+
+# Last collection lookup, reused for COLLECTION_CACHE_TTL seconds (queries check the
+# collection twice per question); reset by upserts and collection creation.
+# ts is None until the first lookup and after a reset (monotonic time can be below the TTL)
+COLLECTION_CACHE_TTL = 5
+_collection_cache = {"exists": None, "info": None, "ts": None}
+
+def _lookup_collection():
     """
-    Check if collection exists without using the problematic get_collection method
+    Get the collection's existence and info with one direct HTTP request (cached briefly)
     """
+    if _collection_cache["ts"] is not None and time.monotonic() - _collection_cache["ts"] < COLLECTION_CACHE_TTL:
+        return _collection_cache
     try:
-        response = requests.get(f"http://{QDRANT_HOST}:{QDRANT_PORT}/collections/{COLLECTION_NAME}")
-        return response.status_code == 200
+        response = _http.get(COLLECTION_URL, timeout=QDRANT_TIMEOUT)
+        exists = response.status_code == 200
+        info = response.json()["result"] if exists else None
     except Exception:
-        return False
+        # Failures are not cached
+        return {"exists": False, "info": None}
+    _collection_cache.update(exists=exists, info=info, ts=time.monotonic())
+    return _collection_cache
+
+def invalidate_collection_cache():
+    """
+    Make the next collection check ask Qdrant again
+    """
+    _collection_cache["ts"] = None
+
+def collection_exists():
+    """
+    Check if collection exists without using the problematic get_collection method
+    """
+    return _lookup_collection()["exists"]
 
 def get_collection_info():
     """
     Get collection info using direct HTTP request to avoid version conflicts
     """
-    try:
-        response = requests.get(f"http://{QDRANT_HOST}:{QDRANT_PORT}/collections/{COLLECTION_NAME}")
-        if response.status_code == 200:
-            return response.json()["result"]
-        return None
-    except Exception:
+    return _lookup_collection()["info"]
+
+def get_quantization_config(quantization):
+    """
+    Build the Qdrant quantization config for a quantization mode ("none", "int8" or "binary")
+    """
+    if quantization == "int8":
+        return ScalarQuantization(
+            scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True)
+        )
+    if quantization == "binary":
+        return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=True))
+    if quantization == "none":
         return None
+    raise ValueError(f"Unknown quantization mode: {quantization}")
+
+# Set once create_collection has seen (or made) the collection in this process
+_collection_ready = False
+
+# Payload fields filtered on during ingestion (see existing_file_versions and _delete_stale_points)
+KEYWORD_INDEX_FIELDS = ("filepath", "content_hash", "page_id")
+
+def ensure_payload_indexes():
+    """
+    Create the keyword payload indexes (KEYWORD_INDEX_FIELDS) so filters on them don't
+    scan every point; creating an index that already exists is a no-op
+    """
+    for field_name in KEYWORD_INDEX_FIELDS:
+        try:
+            client.create_payload_index(
+                collection_name=COLLECTION_NAME,
+                field_name=field_name,
+                field_schema=PayloadSchemaType.KEYWORD
+            )
+        except Exception as e:
+            if "already exists" not in str(e):
+                print(f"⚠️ Could not create payload index on {field_name}: {e}")
 
-def create_collection():
+def create_collection(quantization=DEFAULT_QUANTIZATION):
     """
     Create collection if it doesn't exist, handle conflicts gracefully
+    
+    Quantized collections keep the compressed vectors in RAM and move the
+    full-precision vectors and HNSW graph to disk. Existing collections are left as they are
+    (apart from missing payload indexes, see ensure_payload_indexes).
+    Once the collection is known to exist, later calls in the same process return right away.
     """
+    global _collection_ready
+    if _collection_ready:
+        return
+    
     try:
         # Check if collection exists using direct HTTP request
         if collection_exists():
@@ -58,18 +174,30 @@ def create_collection():
             if info:
                 print(f"   📊 Points: {info.get('points_count', 0)}")
                 print(f"   📊 Status: {info.get('status', 'unknown')}")
+            ensure_payload_indexes()
+            _collection_ready = True
             return
         
         # Create collection
+        quantization_config = get_quantization_config(quantization)
+        on_disk = quantization_config is not None
         client.create_collection(
             collection_name=COLLECTION_NAME,
-            vectors_config=VectorParams(size=768, distance=Distance.COSINE)
+            vectors_config=VectorParams(size=768, distance=Distance.COSINE, on_disk=on_disk),
+            hnsw_config=HnswConfigDiff(on_disk=on_disk),
+            quantization_config=quantization_config
         )
-        print(f"✅ Created collection '{COLLECTION_NAME}'")
+        print(f"✅ Created collection '{COLLECTION_NAME}' (quantization: {quantization})")
+        invalidate_collection_cache()
+        ensure_payload_indexes()
+        _collection_ready = True
         
     except UnexpectedResponse as e:
         if "already exists" in str(e):
             print(f"✅ Collection '{COLLECTION_NAME}' already exists (handled conflict)")
+            invalidate_collection_cache()
+            ensure_payload_indexes()
+            _collection_ready = True
         else:
             print(f"❌ Error creating collection: {e}")
             raise
@@ -77,55 +205,247 @@ def create_collection():
         print(f"❌ Error creating collection: {e}")
         raise
 
-def upsert_embeddings(docs):
+def _set_indexing_threshold(threshold):
+    """
+    Change the collection's optimizer indexing threshold (0 turns HNSW indexing off)
+    """
+    try:
+        client.update_collection(
+            collection_name=COLLECTION_NAME,
+            optimizers_config=OptimizersConfigDiff(indexing_threshold=threshold)
+        )
+    except Exception as e:
+        print(f"⚠️ Could not set indexing threshold to {threshold}: {e}")
+    finally:
+        invalidate_collection_cache()
+
+def _get_indexing_threshold():
+    """
+    Read the collection's current optimizer indexing threshold, or None if it can't be read
+    """
+    invalidate_collection_cache()
+    info = get_collection_info() or {}
+    return info.get("config", {}).get("optimizer_config", {}).get("indexing_threshold")
+
+# Indexing threshold the collection had before begin_bulk_ingest, restored by finalize_ingest
+_saved_indexing_threshold = None
+
+def begin_bulk_ingest():
+    """
+    Defer HNSW indexing while a bulk ingestion upserts points; finalize_ingest turns it back
+    on so the graph is built once in a single optimizer pass
+    """
+    global _saved_indexing_threshold
+    threshold = _get_indexing_threshold()
+    # 0 means an earlier run stopped before finalize_ingest; don't restore that
+    _saved_indexing_threshold = threshold if threshold else INDEXING_THRESHOLD
+    _set_indexing_threshold(0)
+
+def finalize_ingest():
+    """
+    Re-enable indexing after a bulk ingestion, restoring the threshold the collection had
+    before begin_bulk_ingest
+    """
+    _set_indexing_threshold(_saved_indexing_threshold or INDEXING_THRESHOLD)
+
+def payload_text(payload):
+    """
+    Get a point's document text with its "Space/Title" header. Newer points keep the header
+    separately under text_prefix; older ones already have it in text.
+    """
+    text = payload.get("text", "")
+    prefix = payload.get("text_prefix")
+    return f"{prefix}\n\n{text}" if prefix else text
+
+def compact_vector(vector):
+    """
+    Pack an embedding (list of Python floats) into a BUFFER_VECTOR_DTYPE array while it waits for upload
+    """
+    return np.asarray(vector, dtype=np.float32).astype(BUFFER_VECTOR_DTYPE)
+
+# Reused float32 upload buffer (rows x dimension), grown when a batch doesn't fit
+_vector_buffer = None
+_vector_buffer_lock = threading.Lock()
+
+def _fill_vector_buffer(docs):
+    """
+    Copy the documents' vectors into the shared upload buffer and return a view of the
+    filled rows (caller holds _vector_buffer_lock until the upload is done)
+    """
+    global _vector_buffer
+    dimension = len(docs[0]["vector"])
+    if _vector_buffer is None or _vector_buffer.shape[0] < len(docs) or _vector_buffer.shape[1] != dimension:
+        _vector_buffer = np.empty((max(len(docs), UPLOAD_BATCH_SIZE), dimension), dtype=np.float32)
+    
+    vectors = _vector_buffer[:len(docs)]
+    for row, doc in zip(vectors, docs):
+        row[:] = doc["vector"]
+    return vectors
+
+def point_id(doc):
+    """
+    Get the Qdrant point ID of a document: a UUID derived from its identifying metadata
+    (POINT_ID_FIELDS), or a random one when it has none
+    """
+    metadata = doc.get("metadata", {})
+    key = "|".join(str(metadata.get(field) or "") for field in POINT_ID_FIELDS)
+    if not key.strip("|"):
+        return str(uuid.uuid4())
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, key))
+
+# Payload fields that each identify a single document (a page or attachment, a local file)
+DOCUMENT_KEY_FIELDS = ("page_id", "filepath")
+
+def _delete_stale_points(docs, ids):
+    """
+    Delete other points of the given documents (same page_id or filepath, another point ID),
+    such as the integer-ID points written before point IDs were derived from the metadata
+    """
+    conditions = []
+    for field in DOCUMENT_KEY_FIELDS:
+        values = list({doc.get("metadata", {}).get(field) for doc in docs} - {None, ""})
+        if values:
+            conditions.append(FieldCondition(key=field, match=MatchAny(any=values)))
+    if not conditions:
+        return
+    try:
+        client.delete(
+            collection_name=COLLECTION_NAME,
+            points_selector=FilterSelector(filter=Filter(should=conditions, must_not=[HasIdCondition(has_id=ids)])),
+            wait=False
+        )
+    except Exception as e:
+        print(f"⚠️ Could not delete stale points: {e}")
+
+def upsert_embeddings(docs, wait=True):
     """
     Upsert embeddings into the collection
+    
+    Vectors are sent as one contiguous float32 array (a reused buffer) in batches of UPLOAD_BATCH_SIZE,
+    spread over up to UPLOAD_PARALLEL processes when there are several batches;
+    with wait=False the call returns once Qdrant has accepted the points, before they are indexed.
     """
     try:
         if not docs:
             print("⚠️ No documents to upsert")
             return
         
-        # Prepare points
-        points = []
-        for i, doc in enumerate(docs):
-            point = PointStruct(
-                id=i,
-                vector=doc["vector"],
-                payload={
-                    "text": doc["text"],
-                    **doc.get("metadata", {})
-                }
-            )
-            points.append(point)
+        # Prepare payloads
+        payloads = [
+            {
+                "text": doc["text"],
+                **doc.get("metadata", {})
+            }
+            for doc in docs
+        ]
         
-        # Upsert points
-        client.upsert(
-            collection_name=COLLECTION_NAME,
-            points=points
-        )
+        # Upload points (the buffer is only reused once the upload has returned)
+        ids = [point_id(doc) for doc in docs]
+        with _vector_buffer_lock:
+            client.upload_collection(
+                collection_name=COLLECTION_NAME,
+                vectors=_fill_vector_buffer(docs),
+                payload=payloads,
+                ids=ids,
+                batch_size=UPLOAD_BATCH_SIZE,
+                parallel=min(UPLOAD_PARALLEL, -(-len(docs) // UPLOAD_BATCH_SIZE)),
+                wait=wait
+            )
+        # Re-ingested documents may still have points under an older ID scheme
+        _delete_stale_points(docs, ids)
         
+        invalidate_collection_cache()
         print(f"✅ Upserted {len(docs)} documents")
         
     except Exception as e:
         print(f"❌ Error upserting embeddings: {e}")
         raise
 
-def search_similar(query_vector, limit=5):
+def get_search_params(hnsw_ef=None, exact=False, oversampling=None):
+    """
+    Build the Qdrant search params; hnsw_ef and oversampling default to the configured values
+    """
+    hnsw_ef = SEARCH_HNSW_EF if hnsw_ef is None else hnsw_ef
+    oversampling = SEARCH_OVERSAMPLING if oversampling is None else oversampling
+    return SearchParams(
+        hnsw_ef=hnsw_ef,
+        exact=exact,
+        quantization=QuantizationSearchParams(rescore=True, oversampling=oversampling) if oversampling else None
+    )
+
+def search_similar(query_vector, limit=5, with_payload=SEARCH_PAYLOAD_FIELDS, hnsw_ef=None, exact=False, oversampling=None):
     """
     Search for similar documents
+    
+    with_payload selects the returned payload fields (e.g. only titles and URLs when the text isn't needed);
+    hnsw_ef, exact and oversampling trade latency for recall (see get_search_params).
     """
     try:
         results = client.search(
             collection_name=COLLECTION_NAME,
             query_vector=query_vector,
-            limit=limit
+            limit=limit,
+            search_params=get_search_params(hnsw_ef, exact, oversampling),
+            with_payload=with_payload,
+            with_vectors=False
         )
         return results
     except Exception as e:
         print(f"❌ Error searching: {e}")
         return []
 
+def search_similar_batch(query_vectors, limit=5):
+    """
+    Search for similar documents for several query vectors (e.g. query expansions or
+    hypothetical-document embeddings) in one request. Returns one result list per vector.
+    """
+    query_vectors = list(query_vectors)
+    if not query_vectors:
+        return []
+    try:
+        search_params = get_search_params()
+        return client.search_batch(
+            collection_name=COLLECTION_NAME,
+            requests=[SearchRequest(vector=vector, limit=limit, params=search_params,
+                                    with_payload=SEARCH_PAYLOAD_FIELDS) for vector in query_vectors]
+        )
+    except Exception as e:
+        print(f"❌ Error searching: {e}")
+        return [[] for _ in query_vectors]
+
+def existing_file_versions(files):
+    """
+    Get which of the given (filepath, content_hash) pairs are already stored on a point with
+    that filepath and content_hash, so unchanged files can skip embedding and upsert (a file
+    whose content is stored under another path still gets its own point). Returns an empty
+    set on errors.
+    """
+    files = set(files)
+    if not files:
+        return set()
+    
+    try:
+        found = set()
+        offset = None
+        while True:
+            points, offset = client.scroll(
+                collection_name=COLLECTION_NAME,
+                scroll_filter=Filter(must=[
+                    FieldCondition(key="filepath", match=MatchAny(any=list({filepath for filepath, _ in files}))),
+                    FieldCondition(key="content_hash", match=MatchAny(any=list({content_hash for _, content_hash in files})))
+                ]),
+                limit=len(files),
+                offset=offset,
+                with_payload=["filepath", "content_hash"],
+                with_vectors=False
+            )
+            found.update((point.payload.get("filepath"), point.payload.get("content_hash")) for point in points)
+            if offset is None:
+                return found & files
+    except Exception as e:
+        print(f"⚠️ Could not look up stored content hashes: {e}")
+        return set()
+
 def get_collection_stats():
     """
     Get collection statistics
@@ -144,90 +464,142 @@ def get_collection_stats():
         return None
 
 
+# Separator between documents in the get_answer context
+CONTEXT_SEPARATOR = "\n\n---\n\n"
+
+# Leftover HTML tags stripped from document text before it goes into the prompt
+HTML_TAG_RE = re.compile(r'<[^>]+>')
+
+# System prompt for get_answer, sent separately so this static part stays cached in Ollama
+ANSWER_SYSTEM_TEMPLATE = "{system_prompt}\n\n{instruction}"
+
+# Prompt for get_answer, dedented once (dedenting after filling in the context did nothing,
+# since context lines are not indented)
+ANSWER_PROMPT_TEMPLATE = textwrap.dedent("""
+    Context from Confluence documents and PDFs:
+    {context}
+    
+    Question: {query}
+    
+    Answer (be specific and reference the documents):
+""")
+
 def get_answer(query: str, docs: list) -> str:
     """
     Generate an answer using the retrieved documents and the query.
     """
     if not docs:
         return "No relevant documents found."
+    
+    # Use configurable context length for better responses
+    return call_model(build_answer_prompt(query, docs), context_length=DEFAULT_CONTEXT_LENGTH,
+                      system=answer_system_prompt())
+
+
+def get_answer_stream(query: str, docs: list, status=None):
+    """
+    Generate an answer like get_answer, yielding the text as the model generates it.
+    status (optional dict) gets "done" set once the answer is complete (see call_model_stream).
+    """
+    if not docs:
+        yield "No relevant documents found."
+        return
+    
+    yield from call_model_stream(build_answer_prompt(query, docs), context_length=DEFAULT_CONTEXT_LENGTH,
+                                 system=answer_system_prompt(), status=status)
 
-    # Extract context from documents
+
+def answer_system_prompt() -> str:
+    """
+    Build the system prompt for answers from the configured prompt settings.
+    """
+    return ANSWER_SYSTEM_TEMPLATE.format(system_prompt=config["prompt_settings"]["system_prompt"],
+                                         instruction=config["prompt_settings"]["instruction"])
+
+
+def build_answer_prompt(query: str, docs: list) -> str:
+    """
+    Build the LLM prompt (context and question; see answer_system_prompt) for a query from the retrieved documents.
+    """
+    # Extract context from documents; pieces (documents and separators) stop at MAX_CONTEXT_CHARS,
+    # the document that crosses the limit is cut there and later ones are not processed
     context_parts = []
-    print(f"\n🔍 DEBUG: Processing {len(docs)} documents...")
+    context_length = 0
+    truncated = False
+    # Per-document diagnostics are debug logs (main.py -v)
+    log.debug("🔍 Processing %d documents...", len(docs))
     
     for i, doc in enumerate(docs, 1):
-        print(f"  Document {i}:")
-        print(f"    Payload keys: {list(doc.payload.keys()) if hasattr(doc, 'payload') else 'No payload'}")
+        if truncated:
+            log.debug("  Context limit reached, skipping the remaining %d documents", len(docs) - i + 1)
+            break
+        
+        log.debug("  Document %d:", i)
+        log.debug("    Payload keys: %s", list(doc.payload.keys()) if hasattr(doc, 'payload') else 'No payload')
         
         if hasattr(doc, 'payload') and doc.payload:
             # Try different possible text fields
             text = None
             if 'text' in doc.payload:
-                text = doc.payload['text']
-                print(f"    Found 'text' field with {len(text)} characters")
+                text = payload_text(doc.payload)
+                log.debug("    Found 'text' field with %d characters", len(text))
             elif 'content' in doc.payload:
                 text = doc.payload['content']
-                print(f"    Found 'content' field with {len(text)} characters")
+                log.debug("    Found 'content' field with %d characters", len(text))
             else:
-                print(f"    No text field found in payload")
+                log.debug("    No text field found in payload")
             
             if text:
                 # Additional cleaning for any remaining HTML or formatting issues
-                import re
-                text = re.sub(r'<[^>]+>', '', text)
+                # (page text is already extracted from HTML at ingestion, so usually there is no tag)
+                if '<' in text:
+                    text = HTML_TAG_RE.sub('', text)
                 # Clean up extra whitespace
                 text = ' '.join(text.split())
                 if text.strip():
                     title = doc.payload.get("page_title", doc.payload.get("title", f"Document {i}"))
-                    context_parts.append(f"Document {i} ({title}):\n{text}")
-                    print(f"    ✅ Added to context: {title}")
+                    part = f"{CONTEXT_SEPARATOR if context_parts else ''}Document {i} ({title}):\n{text}"
+                    if context_length + len(part) > MAX_CONTEXT_CHARS:
+                        part = part[:MAX_CONTEXT_CHARS - context_length]
+                        truncated = True
+                    context_parts.append(part)
+                    context_length += len(part)
+                    log.debug("    ✅ Added to context: %s", title)
                 else:
-                    print(f"    ❌ Text is empty after cleaning")
+                    log.debug("    ❌ Text is empty after cleaning")
             else:
-                print(f"    ❌ No text content found")
+                log.debug("    ❌ No text content found")
         else:
-            print(f"    ❌ No payload found")
+            log.debug("    ❌ No payload found")
 
-    context = "\n\n---\n\n".join(context_parts)
+    context = "".join(context_parts)
 
     # Limit context size to prevent token overflow
-    if len(context) > MAX_CONTEXT_CHARS:
-        print(f"⚠️ Context too large ({len(context)} chars), truncating to {MAX_CONTEXT_CHARS} chars")
-        context = context[:MAX_CONTEXT_CHARS] + "\n\n[Context truncated due to size limits...]"
+    if truncated:
+        print(f"⚠️ Context too large, truncated to {MAX_CONTEXT_CHARS} chars")
+        context += "\n\n[Context truncated due to size limits...]"
 
-    # Get prompt settings from config
-    system_prompt = config["prompt_settings"]["system_prompt"]
-    instruction = config["prompt_settings"]["instruction"]
-    
-    prompt = textwrap.dedent(f"""
-        {system_prompt}
-        
-        {instruction}
-        
-        Context from Confluence documents and PDFs:
-        {context}
-        
-        Question: {query}
-        
-        Answer (be specific and reference the documents):
-    """)
+    prompt = ANSWER_PROMPT_TEMPLATE.format(context=context, query=query)
 
-    # Debug logging based on config
-    if config["debug_settings"]["enable_debug_logging"]:
-        print(f"\n🔍 DEBUG: Prompt being sent to LLM:")
-        print(f"Context length: {len(context)} characters")
-        
-        if config["debug_settings"]["show_context_preview"]:
-            print(f"Context preview: {context[:500]}...")
-        
-        print(f"Question: {query}")
-        print(f"---")
+    log.debug("🔍 Prompt being sent to LLM: context from %d of %d documents, %d characters",
+              len(context_parts), len(docs), len(context))
+    if config["debug_settings"]["show_context_preview"]:
+        log.debug("Context preview: %s...", context[:500])
+    log.debug("Question: %s", query)
 
-    # Use configurable context length for better responses
-    return call_model(prompt, context_length=DEFAULT_CONTEXT_LENGTH)
+    return prompt
 
 
-def set_context_config(top_k=None, context_length=None, max_context_chars=None):
+def _save_context_setting(key, value):
+    """
+    Update a context setting in the loaded config (shared with the web app) and in the config file
+    """
+    from src.config_loader import update_config_section
+    config["context_settings"][key] = value
+    update_config_section("context_settings", key, value)
+
+
+def set_context_config(top_k=None, context_length=None, max_context_chars=None, hnsw_ef=None, oversampling=None):
     """
     Dynamically adjust context configuration and save to config file.
     
@@ -235,24 +607,35 @@ def set_context_config(top_k=None, context_length=None, max_context_chars=None):
         top_k: Number of documents to retrieve
         context_length: Token limit for LLM context
         max_context_chars: Maximum characters in context
+        hnsw_ef: HNSW search beam width
+        oversampling: Candidate oversampling for quantized search (0 turns rescoring off)
     """
-    global DEFAULT_TOP_K, DEFAULT_CONTEXT_LENGTH, MAX_CONTEXT_CHARS
-    from src.config_loader import update_config_section
+    global DEFAULT_TOP_K, DEFAULT_CONTEXT_LENGTH, MAX_CONTEXT_CHARS, SEARCH_HNSW_EF, SEARCH_OVERSAMPLING
     
     if top_k is not None:
         DEFAULT_TOP_K = top_k
-        update_config_section("context_settings", "default_top_k", top_k)
+        _save_context_setting("default_top_k", top_k)
         print(f"✅ Set top_k to {DEFAULT_TOP_K}")
     
     if context_length is not None:
         DEFAULT_CONTEXT_LENGTH = context_length
-        update_config_section("context_settings", "default_context_length", context_length)
+        _save_context_setting("default_context_length", context_length)
         print(f"✅ Set context_length to {DEFAULT_CONTEXT_LENGTH}")
     
     if max_context_chars is not None:
         MAX_CONTEXT_CHARS = max_context_chars
-        update_config_section("context_settings", "max_context_chars", max_context_chars)
+        _save_context_setting("max_context_chars", max_context_chars)
         print(f"✅ Set max_context_chars to {MAX_CONTEXT_CHARS}")
+    
+    if hnsw_ef is not None:
+        SEARCH_HNSW_EF = hnsw_ef
+        _save_context_setting("hnsw_ef", hnsw_ef)
+        print(f"✅ Set hnsw_ef to {SEARCH_HNSW_EF}")
+    
+    if oversampling is not None:
+        SEARCH_OVERSAMPLING = oversampling
+        _save_context_setting("oversampling", oversampling)
+        print(f"✅ Set oversampling to {SEARCH_OVERSAMPLING}")
 
 
 def get_context_config():
@@ -262,5 +645,7 @@ def get_context_config():
     return {
         "top_k": DEFAULT_TOP_K,
         "context_length": DEFAULT_CONTEXT_LENGTH,
-        "max_context_chars": MAX_CONTEXT_CHARS
+        "max_context_chars": MAX_CONTEXT_CHARS,
+        "hnsw_ef": SEARCH_HNSW_EF,
+        "oversampling": SEARCH_OVERSAMPLING
     }
@@ -0,0 +1,21 @@
+# tests/test_format_response.py
+
+import unittest
+
+from src.format_response import format_inline_numbered_list
+
+
+class FormatInlineNumberedListTest(unittest.TestCase):
+    def test_splits_items_with_lowercase_labels(self):
+        formatted = format_inline_numbered_list("Columns: 1. Foo: a 2. crew_id: b")
+        self.assertIn("1. **Foo**: a\n", formatted)
+        self.assertIn("2. **crew_id**: b", formatted)
+
+    def test_keeps_digits_in_descriptions(self):
+        formatted = format_inline_numbered_list("Columns: 1. Duty: max 12 hours 2. Rest: 10 hours")
+        self.assertIn("1. **Duty**: max 12 hours\n", formatted)
+        self.assertIn("2. **Rest**: 10 hours", formatted)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,19 +5,21 @@ Flask web application for Confluence Q&A Bot
 
 import os
 import json
-import time
 from flask import Flask, render_template, request, jsonify, Response
 from flask_cors import CORS
-from src.ollama_client import get_embedding
-from src.vector_store import query_similar, get_answer, get_context_config
+from src.vector_store import get_answer, get_answer_stream, get_context_config
 from src.config_loader import load_qa_config
+from src.rag_pipeline import run_retrieval, remember_answer
 from src.format_response import enhance_response_formatting
 
 app = Flask(__name__)
 CORS(app)
 
-# Load configuration
-config = load_qa_config()
+# Error message and HTTP status for retrievals with nothing to answer from
+RETRIEVAL_ERRORS = {
+    "embedding_error": ('Failed to generate embedding', 500),
+    "no_matches": ('No relevant documents found', 404)
+}
 
 @app.route('/')
 def index():
@@ -34,47 +36,24 @@ def chat():
         if not query:
             return jsonify({'error': 'No message provided'}), 400
         
-        # Get embedding for the query
-        vector = get_embedding(query)
-        if not vector:
-            return jsonify({'error': 'Failed to generate embedding'}), 500
+        retrieval = run_retrieval(query)
+        if retrieval["status"] in RETRIEVAL_ERRORS:
+            message, status_code = RETRIEVAL_ERRORS[retrieval["status"]]
+            return jsonify({'error': message}), status_code
         
-        # Get similar documents
-        context_docs = query_similar(vector)
-        
-        if not context_docs:
-            return jsonify({'error': 'No relevant documents found'}), 404
-        
-        # Prepare sources for response
-        sources = []
-        for i, doc in enumerate(context_docs, 1):
-            title = (doc.payload.get("page_title") or 
-                    doc.payload.get("title") or 
-                    doc.payload.get("attachment_title") or 
-                    "Unknown")
-            
-            url = doc.payload.get("url", "")
-            content_type = doc.payload.get("content_type", "page")
-            space_name = doc.payload.get("space_name", "")
-            
-            source_info = {
-                "id": i,
-                "title": title,
-                "url": url,
-                "content_type": content_type,
-                "space_name": space_name
-            }
-            sources.append(source_info)
-        
-        # Generate answer
-        answer = get_answer(query, context_docs)
+        if retrieval["status"] == "cached":
+            answer = retrieval["answer"]
+        else:
+            # Generate answer
+            answer = get_answer(query, retrieval["docs"])
+            remember_answer(query, retrieval, answer)
         
         # Enhance formatting
         formatted_answer = enhance_response_formatting(answer)
         
         return jsonify({
             'answer': formatted_answer,
-            'sources': sources,
+            'sources': retrieval["sources"],
             'query': query
         })
         
@@ -95,55 +74,31 @@ def stream_chat():
             # Send initial response
             yield f"data: {json.dumps({'type': 'start', 'query': query})}\n\n"
             
-            # Get embedding for the query
-            vector = get_embedding(query)
-            if not vector:
-                yield f"data: {json.dumps({'type': 'error', 'message': 'Failed to generate embedding'})}\n\n"
-                return
-            
-            # Get similar documents
-            context_docs = query_similar(vector)
-            
-            if not context_docs:
-                yield f"data: {json.dumps({'type': 'error', 'message': 'No relevant documents found'})}\n\n"
+            retrieval = run_retrieval(query)
+            if retrieval["status"] in RETRIEVAL_ERRORS:
+                message = RETRIEVAL_ERRORS[retrieval["status"]][0]
+                yield f"data: {json.dumps({'type': 'error', 'message': message})}\n\n"
                 return
             
             # Send sources info
-            sources = []
-            for i, doc in enumerate(context_docs, 1):
-                title = (doc.payload.get("page_title") or 
-                        doc.payload.get("title") or 
-                        doc.payload.get("attachment_title") or 
-                        "Unknown")
-                
-                url = doc.payload.get("url", "")
-                content_type = doc.payload.get("content_type", "page")
-                space_name = doc.payload.get("space_name", "")
-                
-                source_info = {
-                    "id": i,
-                    "title": title,
-                    "url": url,
-                    "content_type": content_type,
-                    "space_name": space_name
-                }
-                sources.append(source_info)
-            
-            yield f"data: {json.dumps({'type': 'sources', 'sources': sources})}\n\n"
+            yield f"data: {json.dumps({'type': 'sources', 'sources': retrieval['sources']})}\n\n"
             
-            # Generate answer
-            answer = get_answer(query, context_docs)
+            if retrieval["status"] == "cached":
+                answer = retrieval["answer"]
+                yield f"data: {json.dumps({'type': 'chunk', 'text': answer})}\n\n"
+            else:
+                # Stream the answer as the model generates it
+                answer_parts = []
+                stream_status = {}
+                for text in get_answer_stream(query, retrieval["docs"], stream_status):
+                    answer_parts.append(text)
+                    yield f"data: {json.dumps({'type': 'chunk', 'text': text})}\n\n"
+                answer = "".join(answer_parts)
+                remember_answer(query, retrieval, answer, complete=stream_status.get("done", False))
             
-            # Enhance formatting
+            # Send completion signal with the formatted full answer
             formatted_answer = enhance_response_formatting(answer)
-            
-            # Stream the answer character by character
-            for char in formatted_answer:
-                yield f"data: {json.dumps({'type': 'char', 'char': char})}\n\n"
-                time.sleep(0.01)  # Small delay for typing effect
-            
-            # Send completion signal
-            yield f"data: {json.dumps({'type': 'complete'})}\n\n"
+            yield f"data: {json.dumps({'type': 'complete', 'answer': formatted_answer})}\n\n"
         
         return Response(generate(), mimetype='text/plain')
         
@@ -157,7 +112,9 @@ def get_config():
         context_config = get_context_config()
         return jsonify({
             'context_settings': context_config,
-            'qa_config': config
+            # Read on every request (re-parsed only when the file changed), so edits made by
+            # edit_config.py or another process show up without a restart
+            'qa_config': load_qa_config()
         })
     except Exception as e:
         return jsonify({'error': f'Error getting config: {str(e)}'}), 500
@@ -176,7 +133,9 @@ def update_config():
             set_context_config(
                 top_k=context_settings.get('top_k'),
                 context_length=context_settings.get('context_length'),
-                max_context_chars=context_settings.get('max_context_chars')
+                max_context_chars=context_settings.get('max_context_chars'),
+                hnsw_ef=context_settings.get('hnsw_ef'),
+                oversampling=context_settings.get('oversampling')
             )
         
         return jsonify({'message': 'Configuration updated successfully'})